@@ -11,12 +11,96 @@ st.set_page_config(
 st.title("🌳 蚊虫识别系统 · 作战地图")
 st.markdown("### 🎯 一眼看懂项目进度与瓶颈")
 
-# 获取所有进行中的任务
-active_tasks = db_adapter.get_all_active_tasks()
+# 并发预取本页用到的两个集合 (进入读缓存，后面的读取直接命中)
+db_adapter.load_collections(["tasks", "contributions"])
+
+# 获取所有任务 (带分类/状态/进度索引)
+task_index = db_adapter.get_task_index()
+active_tasks = task_index.tasks
 
 st.markdown("---")
 
 # ================= 纯 Streamlit 组件构建树状视图 =================
+# 每个二级分支一页最多显示的任务卡片数，超出部分分页
+TASK_PAGE_SIZE = 20
+
+def task_card_html(task):
+    p = task['progress']
+    name = task['name']
+    creator = task.get('creator', '?')
+    status = task.get('status', '进行中')
+    
+    # 默认样式 (进行中)
+    icon = "🔴"
+    color_style = "border-left: 5px solid #FF5252;" # 红条
+    bg_color = "#FFEBEE"
+    status_text = f"{p}%"
+    
+    if status == "已完成":
+        icon = "✅"
+        color_style = "border-left: 5px solid #4CAF50;" # 深绿条
+        bg_color = "#E8F5E9"
+        status_text = "DONE"
+    elif status == "暂停":
+        icon = "⏸️"
+        color_style = "border-left: 5px solid #9E9E9E;" # 灰条
+        bg_color = "#F5F5F5"
+        status_text = "PAUSED"
+    else:
+        # 进行中状态根据进度变色
+        if p >= 30: 
+            icon = "🟡"
+            color_style = "border-left: 5px solid #FFD740;" 
+            bg_color = "#FFFDE7"
+        if p >= 80: 
+            icon = "🟢"
+            color_style = "border-left: 5px solid #66BB6A;" 
+            bg_color = "#E8F5E9"
+
+    # 使用 HTML 卡片模拟叶子节点 (单行输出，多张卡片可以拼接进同一个 markdown)
+    return (
+        f'<div style="margin-left: 40px; margin-bottom: 8px; padding: 8px 12px; '
+        f'background-color: {bg_color}; border-radius: 4px; {color_style} '
+        f'display: flex; align-items: center; justify-content: space-between;">'
+        f'<div style="flex: 2;"><strong>{icon} {name}</strong>'
+        f'<div style="font-size: 0.8em; color: #666;">👤 {creator}</div></div>'
+        f'<div style="flex: 1; text-align: right;">'
+        f'<div style="font-weight: bold; font-size: 1.1em;">{status_text}</div>'
+        f'<div style="font-size: 0.7em; color: #666;">{status}</div></div>'
+        f'</div>'
+    )
+
+@st.cache_data(max_entries=512, show_spinner=False)
+def render_branch_page(category, sub, page, data_version):
+    # 预渲染一个二级分支某一页的全部卡片，按任务数据版本缓存 (data_version 只作为缓存键)
+    tasks = db_adapter.get_task_index().in_branch(category, sub)
+    start = page * TASK_PAGE_SIZE
+    return "".join(task_card_html(t) for t in tasks[start:start + TASK_PAGE_SIZE])
+
+@st.fragment
+def render_branch(category, sub):
+    # 以 fragment 渲染：翻页只重跑这一个分支，不重绘整棵树
+    index = db_adapter.get_task_index()
+    task_count = len(index.in_branch(category, sub))
+
+    # 二级分支标题 + 任务统计
+    st.markdown(f"**└─ 📁 {sub}** <small style='color:gray'>({task_count} 个任务)</small>", unsafe_allow_html=True)
+    
+    if task_count == 0:
+        st.markdown("&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;*(暂无任务)*")
+    else:
+        page = 0
+        page_count = (task_count + TASK_PAGE_SIZE - 1) // TASK_PAGE_SIZE
+        if page_count > 1:
+            page = st.number_input(
+                f"页码 (共 {page_count} 页)", min_value=1, max_value=page_count, value=1,
+                key=f"tree_page_{category}_{sub}"
+            ) - 1
+        st.markdown(render_branch_page(category, sub, page, index.version), unsafe_allow_html=True)
+    
+    # 分隔线
+    st.markdown("<div style='height: 10px'></div>", unsafe_allow_html=True)
+
 # 根节点
 st.info("🦟 **蚊虫识别系统 (ROOT)**")
 
@@ -24,96 +108,13 @@ st.info("🦟 **蚊虫识别系统 (ROOT)**")
 for category, subcategories in db_adapter.CATEGORIES.items():
     # 使用 Expander 模拟一级分支，默认全部展开以便“一眼看全”
     with st.expander(f"📂 {category}", expanded=True):
-        
         # 遍历二级分类
         for sub in subcategories:
-            # 筛选该分支下的任务
-            related_tasks = [t for t in active_tasks if t['category'] == category and t['subcategory'] == sub]
-            
-            # 二级分支标题 + 任务统计
-            task_count = len(related_tasks)
-            st.markdown(f"**└─ 📁 {sub}** <small style='color:gray'>({task_count} 个任务)</small>", unsafe_allow_html=True)
-            
-            if not related_tasks:
-                st.markdown("&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;*(暂无任务)*")
-            else:
-                # 遍历任务 (叶子节点)
-                for task in related_tasks:
-                    p = task['progress']
-                    name = task['name']
-                    creator = task.get('creator', '?')
-                    status = task.get('status', '进行中')
-                    
-                    # 默认样式 (进行中)
-                    icon = "🔴"
-                    color_style = "border-left: 5px solid #FF5252;" # 红条
-                    bg_color = "#FFEBEE"
-                    status_text = f"{p}%"
-                    
-                    if status == "已完成":
-                        icon = "✅"
-                        color_style = "border-left: 5px solid #4CAF50;" # 深绿条
-                        bg_color = "#E8F5E9"
-                        status_text = "DONE"
-                    elif status == "暂停":
-                        icon = "⏸️"
-                        color_style = "border-left: 5px solid #9E9E9E;" # 灰条
-                        bg_color = "#F5F5F5"
-                        status_text = "PAUSED"
-                    else:
-                        # 进行中状态根据进度变色
-                        if p >= 30: 
-                            icon = "🟡"
-                            color_style = "border-left: 5px solid #FFD740;" 
-                            bg_color = "#FFFDE7"
-                        if p >= 80: 
-                            icon = "🟢"
-                            color_style = "border-left: 5px solid #66BB6A;" 
-                            bg_color = "#E8F5E9"
-
-                    # 使用 HTML 卡片模拟叶子节点
-                    st.markdown(
-                        f"""
-                        <div style="
-                            margin-left: 40px;
-                            margin-bottom: 8px;
-                            padding: 8px 12px;
-                            background-color: {bg_color};
-                            border-radius: 4px;
-                            {color_style}
-                            display: flex;
-                            align-items: center;
-                            justify-content: space-between;
-                        ">
-                            <div style="flex: 2;">
-                                <strong>{icon} {name}</strong>
-                                <div style="font-size: 0.8em; color: #666;">
-                                    👤 {creator}
-                                </div>
-                            </div>
-                            <div style="flex: 1; text-align: right;">
-                                <div style="font-weight: bold; font-size: 1.1em;">{status_text}</div>
-                                <div style="font-size: 0.7em; color: #666;">{status}</div>
-                            </div>
-                        </div>
-                        """,
-                        unsafe_allow_html=True
-                    )
-            
-            # 分隔线
-            st.markdown("<div style='height: 10px'></div>", unsafe_allow_html=True)
+            render_branch(category, sub)
 
 # ================= 兜底展示：未分类/匹配失败的任务 =================
-# 收集所有已显示的任务 ID
-shown_task_ids = set()
-for category, subcategories in db_adapter.CATEGORIES.items():
-    for sub in subcategories:
-        related = [t for t in active_tasks if t['category'] == category and t['subcategory'] == sub]
-        for t in related:
-            shown_task_ids.add(t['id'])
-
-# 找出漏网之鱼
-orphan_tasks = [t for t in active_tasks if t.get('id') not in shown_task_ids]
+# 找出漏网之鱼 (分类不在 CATEGORIES 结构中的任务)
+orphan_tasks = task_index.unclassified()
 
 if orphan_tasks:
     with st.expander("📂 其他/未分类任务 (Orphan Tasks)", expanded=True):
@@ -125,7 +126,7 @@ st.markdown("---")
 
 # ================= 关键问题看板 =================
 st.subheader("🚨 风险预警 (Focus Areas)")
-risk_tasks = [t for t in active_tasks if t['progress'] < 30]
+risk_tasks = task_index.in_progress_bucket(0)
 
 if not risk_tasks:
     st.success("🎉 目前没有严重滞后的任务！")
@@ -151,7 +152,11 @@ if not df.empty:
     # 过滤出存在的列
     final_cols = [c for c in cols if c in df.columns]
     
+    latest = df[final_cols].sort_values("date", ascending=False).head(5)
+    # date 列在视图里是 datetime，展示时还原成日期字符串
+    if "date" in latest.columns and pd.api.types.is_datetime64_any_dtype(latest["date"]):
+        latest = latest.assign(date=latest["date"].dt.strftime("%Y-%m-%d"))
     st.dataframe(
-        df[final_cols].sort_values("date", ascending=False).head(5), 
+        latest, 
         use_container_width=True
     )
@@ -0,0 +1,205 @@
+"""
+进程内的 Firestore 替身 (只用于基准测试)
+实现了 db_adapter 用到的客户端子集：collection / document / where / select / order_by /
+limit / start_after / stream / batch / on_snapshot，并统计读文档数与 batch 提交次数
+"""
+import copy
+import threading
+import uuid
+
+
+class Snapshot:
+    def __init__(self, ref, data):
+        self.reference = ref
+        self.id = ref.id
+        self._data = data
+        self.exists = data is not None
+
+    def to_dict(self):
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+
+class DocumentRef:
+    def __init__(self, client, collection_name, doc_id):
+        self._client, self._collection, self.id = client, collection_name, doc_id
+
+    def get(self):
+        self._client.reads += 1
+        return Snapshot(self, self._client._data[self._collection].get(self.id))
+
+    def set(self, data):
+        self._client._write(self._collection, self.id, copy.deepcopy(data))
+
+    def update(self, fields):
+        data = dict(self._client._data[self._collection][self.id])
+        data.update(fields)
+        self._client._write(self._collection, self.id, data)
+
+    def delete(self):
+        self._client._write(self._collection, self.id, None)
+
+
+def _match(data, field, op, value):
+    v = data.get(field)
+    if op == "==":
+        return v == value
+    if op == "in":
+        return v in value
+    if op == "array_contains":
+        return isinstance(v, list) and value in v
+    raise ValueError(f"不支持的查询操作: {op}")
+
+
+class Query:
+    def __init__(self, client, collection_name, wheres=(), fields=None, order=None, limit=None, after=None):
+        self._client, self._collection = client, collection_name
+        self._wheres, self._fields = list(wheres), fields
+        self._order, self._limit, self._after = order, limit, after
+
+    def _clone(self, **changes):
+        args = dict(wheres=self._wheres, fields=self._fields, order=self._order, limit=self._limit, after=self._after)
+        args.update(changes)
+        return Query(self._client, self._collection, **args)
+
+    def where(self, field_path=None, op_string=None, value=None, filter=None):
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        return self._clone(wheres=self._wheres + [(field_path, op_string, value)])
+
+    def select(self, fields):
+        return self._clone(fields=list(fields))
+
+    def order_by(self, field, direction="ASCENDING"):
+        return self._clone(order=(self._order or []) + [(field, direction)])
+
+    def limit(self, n):
+        return self._clone(limit=n)
+
+    def start_after(self, cursor):
+        # cursor 可以是文档快照，也可以是 {排序字段: 值, "__name__": 文档引用} 字典
+        if isinstance(cursor, Snapshot):
+            return self._clone(after=(cursor.id, cursor.to_dict()))
+        ref = cursor.get("__name__")
+        return self._clone(after=(ref.id if ref is not None else "", cursor))
+
+    def _sort_key(self, doc_id, data):
+        # 与 Firestore 一致：依次按各排序字段，最后按文档 id；"__name__" 表示按文档 id 排序
+        key = []
+        for field, _ in self._order:
+            if field == "__name__":
+                key.append(doc_id)
+            else:
+                value = data.get(field)
+                key += [value is not None, value if value is not None else ""]
+        return tuple(key) + (doc_id,)
+
+    def stream(self):
+        items = [(k, v) for k, v in self._client._data[self._collection].items()
+                 if all(_match(v, *w) for w in self._wheres)]
+        if self._order:
+            # 与 Firestore 一致：缺少排序字段的文档不出现在结果中 (字段值为 null 的仍然保留)
+            fields = [f for f, _ in self._order if f != "__name__"]
+            items = [kv for kv in items if all(f in kv[1] for f in fields)]
+            # 只支持所有排序字段同一方向
+            descending = self._order[0][1] == "DESCENDING"
+            items.sort(key=lambda kv: self._sort_key(*kv), reverse=descending)
+            if self._after is not None:
+                after = self._sort_key(*self._after)
+                items = [kv for kv in items
+                         if (self._sort_key(*kv) < after if descending else self._sort_key(*kv) > after)]
+        if self._limit is not None:
+            items = items[:self._limit]
+        for doc_id, data in items:
+            self._client.reads += 1
+            # 与 Firestore 一致：空投影返回全部字段；只投影 __name__ 时返回空文档
+            if self._fields:
+                data = {f: data[f] for f in self._fields if f in data}
+            yield Snapshot(DocumentRef(self._client, self._collection, doc_id), data)
+
+    def get(self):
+        return list(self.stream())
+
+
+class CollectionRef(Query):
+    def __init__(self, client, collection_name):
+        super().__init__(client, collection_name)
+
+    def document(self, doc_id=None):
+        return DocumentRef(self._client, self._collection, doc_id or uuid.uuid4().hex[:20])
+
+    def add(self, data):
+        ref = self.document()
+        ref.set(data)
+        return None, ref
+
+    def on_snapshot(self, callback):
+        self._client._listeners.setdefault(self._collection, []).append(callback)
+        docs = list(Query(self._client, self._collection).stream())
+        callback(docs, [_Change("ADDED", doc) for doc in docs], None)
+        return _Watch()
+
+
+class _Watch:
+    def unsubscribe(self):
+        pass
+
+
+class _ChangeType:
+    def __init__(self, name):
+        self.name = name
+
+
+class _Change:
+    def __init__(self, kind, document):
+        self.type = _ChangeType(kind)
+        self.document = document
+
+
+class WriteBatch:
+    def __init__(self, client):
+        self._client, self._ops = client, []
+
+    def set(self, ref, data):
+        self._ops.append((ref.set, data))
+
+    def update(self, ref, data):
+        self._ops.append((ref.update, data))
+
+    def delete(self, ref):
+        self._ops.append((lambda _: ref.delete(), None))
+
+    def commit(self):
+        if len(self._ops) > 500:
+            raise ValueError("单个 batch 最多 500 个写操作")
+        self._client.commits += 1
+        for op, data in self._ops:
+            op(data)
+
+
+class FakeFirestoreClient:
+    def __init__(self):
+        self._data = {}
+        self._listeners = {}
+        self._lock = threading.Lock()
+        self.reads = 0      # 累计读取的文档数 (对应 Firestore 读计费)
+        self.commits = 0    # 累计 batch 提交次数
+
+    def collection(self, name):
+        self._data.setdefault(name, {})
+        return CollectionRef(self, name)
+
+    def batch(self):
+        return WriteBatch(self)
+
+    def _write(self, collection_name, doc_id, data):
+        with self._lock:
+            docs = self._data.setdefault(collection_name, {})
+            existed = doc_id in docs
+            if data is None:
+                docs.pop(doc_id, None)
+            else:
+                docs[doc_id] = data
+        kind = "REMOVED" if data is None else ("MODIFIED" if existed else "ADDED")
+        snapshot = Snapshot(DocumentRef(self, collection_name, doc_id), data)
+        for callback in self._listeners.get(collection_name, []):
+            callback([], [_Change(kind, snapshot)], None)
@@ -0,0 +1,299 @@
+"""
+存储层 / 页面加载基准测试
+
+    python benchmarks/run_benchmarks.py --sizes 1k,10k --backends local,sqlite,firebase
+    python benchmarks/run_benchmarks.py --sizes 100k --backends log --no-pages --output bench_100k.json
+
+每个 (后端, 数据量) 组合在独立的临时目录中运行：先用合成数据批量灌库，再逐项计时 db_adapter 的读写操作
+和 Home / 数据看板页面的一次完整渲染，结果写成 JSON 报告，便于在不同提交之间对比回归
+firebase / firebase_mirror 使用进程内的 Firestore 替身，额外记录每个操作读取的文档数
+"""
+import argparse
+import importlib
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pandas as pd
+
+import db_adapter
+import query_engine
+from fake_firestore import FakeFirestoreClient
+from firestore_mirror import FirestoreMirror
+from synthetic import generate
+
+SIZES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+BACKENDS = ["local", "log", "sqlite", "firebase", "firebase_mirror"]
+PAGES = {"render_home": "Home.py", "render_dashboard": "pages/2_📊_数据看板.py"}
+LOAD_CHUNK = 5_000
+# save_many / delete_many 每次计时处理的记录数
+BATCH_SIZE = 500
+# 导出 / 导入 / 迁移 / 批量重算这类整集合操作的重复次数上限
+BULK_REPEAT = 3
+
+
+# ================= 环境准备 =================
+def open_backend(backend, workdir):
+    """在 workdir 中打开一个全新的后端；重新加载 db_adapter 以清空全部进程级缓存和视图"""
+    os.chdir(workdir)
+    os.makedirs(".streamlit", exist_ok=True)
+    open(os.path.join(".streamlit", "secrets.toml"), "w").close()
+    os.environ.pop("MOSQUITO_BACKEND", None)
+    importlib.reload(db_adapter)
+    client = None
+    if backend.startswith("firebase"):
+        client = FakeFirestoreClient()
+        mirror = FirestoreMirror(client, ["tasks", "contributions"]) if backend == "firebase_mirror" else None
+        db_adapter._db_client = {"type": "firebase", "client": client, "mirror": mirror}
+    else:
+        os.environ["MOSQUITO_BACKEND"] = backend
+    db_adapter.get_db()
+    return client
+
+
+def reset_caches():
+    # 模拟进程冷启动后的第一次读取：丢弃读缓存、物化视图、汇总表和各类索引
+    db_adapter.clear_cache()
+    db_adapter._contrib_view.invalidate()
+    db_adapter._contrib_rollup.invalidate()
+    db_adapter._task_index = None
+    db_adapter._dashboard_query = None
+    db_adapter._seek_indexes.clear()
+
+
+# ================= 计时 =================
+def measure(fn, repeat, client=None, before=None):
+    samples, reads = [], []
+    for _ in range(repeat):
+        if before:
+            before()
+        start_reads = client.reads if client else 0
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+        reads.append((client.reads - start_reads) if client else None)
+    result = {
+        "repeat": repeat,
+        "median_ms": round(statistics.median(samples), 3),
+        "min_ms": round(min(samples), 3),
+        "max_ms": round(max(samples), 3),
+    }
+    if client:
+        result["docs_read"] = int(statistics.median(reads))
+    return result
+
+
+def render_page(path):
+    from streamlit.testing.v1 import AppTest
+    app = AppTest.from_file(os.path.join(ROOT, path), default_timeout=600)
+    app.run()
+    if app.exception:
+        raise RuntimeError(f"{path} 渲染出错: {app.exception[0].value}")
+
+
+def fresh_copies(items, count):
+    """循环取 count 条记录并换上新 id，每次调用都是一批全新写入"""
+    start = 0
+    while True:
+        batch = [dict(items[(start + i) % len(items)], id=str(uuid.uuid4())) for i in range(count)]
+        start += count
+        yield batch
+
+
+def flip_musk_factors():
+    """每调用一次把 M 系数在 原值 / 原值×2 之间切换，使批量重算时每条记录都有变化"""
+    original = dict(db_adapter.SCORE_CONFIG["M_Musk"])
+    state = {"doubled": False}
+
+    def flip():
+        state["doubled"] = not state["doubled"]
+        factor = 2 if state["doubled"] else 1
+        db_adapter.SCORE_CONFIG["M_Musk"].update({k: v * factor for k, v in original.items()})
+
+    def restore():
+        db_adapter.SCORE_CONFIG["M_Musk"].update(original)
+    return flip, restore
+
+
+def run_case(backend, size_name, repeat, with_pages):
+    tasks, contributions = generate(SIZES[size_name])
+    workdir = tempfile.mkdtemp(prefix=f"bench_{backend}_{size_name}_")
+    cwd = os.getcwd()
+    results = {}
+    try:
+        client = open_backend(backend, workdir)
+
+        def bulk_load():
+            db_adapter.save_many("tasks", tasks)
+            for i in range(0, len(contributions), LOAD_CHUNK):
+                db_adapter.save_many("contributions", contributions[i:i + LOAD_CHUNK])
+        results["bulk_load"] = measure(bulk_load, 1, client)
+
+        user = tasks[0]["contributors"][0]
+        task = tasks[0]
+        sample_ids = iter([c["id"] for c in contributions])
+        # 级联删除 / 加入任务各自从任务列表的两端取，避开 tasks[0]
+        cascade_tasks = iter(tasks[:0:-1])
+        join_tasks = iter(tasks[1:])
+        new_batches = fresh_copies(contributions, BATCH_SIZE)
+        saved_batches = []  # save_many 写入的各批 id，之后由 delete_many 逐批删除
+
+        def save_batch():
+            batch = next(new_batches)
+            db_adapter.save_many("contributions", batch)
+            saved_batches.append([c["id"] for c in batch])
+        progress = iter(range(1, 1_000_000))
+        migrate_target = "log" if backend == "sqlite" else "sqlite"
+        flip_musk, restore_musk = flip_musk_factors()
+
+        def first_page():
+            return db_adapter.list_contributions("timestamp", 50)
+        cursor = first_page()[1]
+
+        def dashboard_queries():
+            query = db_adapter.get_dashboard_query()
+            start, end = query.date_bounds()
+            filters = {"users": query.users(), "start": start, "end": end}
+            query.summary(**filters)
+            query.leaderboard(**filters)
+            query.trend(bucket=query_engine.choose_trend_bucket(start, end), **filters)
+            query.details(["date", "user", "task_name", "V"], limit=1000, **filters)
+
+        reads = {
+            "get_contributions": db_adapter.get_contributions,
+            "get_contribution_rollup": db_adapter.get_contribution_rollup,
+            "get_task_index": db_adapter.get_task_index,
+            "get_all_active_tasks": db_adapter.get_all_active_tasks,
+            "get_user_involved_tasks": lambda: db_adapter.get_user_involved_tasks(user),
+            "get_task_contributions": lambda: db_adapter.get_task_contributions(task["id"]),
+            "list_contributions_first_page": first_page,
+            "list_contributions_next_page": lambda: db_adapter.list_contributions("timestamp", 50, cursor),
+            "dashboard_queries": dashboard_queries,
+        }
+        for name, fn in reads.items():
+            results[f"{name}_cold"] = measure(fn, repeat, client, before=reset_caches)
+            fn()
+            results[f"{name}_warm"] = measure(fn, repeat, client)
+
+        writes = {
+            "save_item": lambda: db_adapter.add_contribution(
+                user, task["id"], task["name"], task["category"], task["subcategory"],
+                contributions[0]["score"], "基准测试写入"),
+            "create_task": lambda: db_adapter.create_task(user, "基准测试任务", task["category"], task["subcategory"]),
+            "update_item_field": lambda: db_adapter.update_item_field("contributions", next(sample_ids), "description", "已修改"),
+            "join_task": lambda: db_adapter.join_task("基准测试成员", next(join_tasks)["id"]),
+            "update_task_progress": lambda: db_adapter.update_task_progress(task["id"], next(progress) % 100),
+            f"save_many_{BATCH_SIZE}": save_batch,
+            "delete_item": lambda: db_adapter.delete_item("contributions", next(sample_ids)),
+            # 写入后紧接着读取：衡量物化视图的增量维护开销
+            "save_then_get_contributions": lambda: (
+                db_adapter.add_contribution(user, task["id"], task["name"], task["category"], task["subcategory"],
+                                            contributions[0]["score"], "基准测试写入"),
+                db_adapter.get_contributions(),
+            ),
+        }
+        db_adapter.get_contributions()
+        for name, fn in writes.items():
+            results[name] = measure(fn, repeat, client)
+
+        # 整集合操作：导出 / 导入 / 迁移 / 批量重算 (全部记录都变化)
+        export_path = os.path.join(workdir, "contributions.ndjson")
+        bulk_repeat = min(repeat, BULK_REPEAT)
+        bulk = {
+            "export_collection": lambda: db_adapter.export_collection("contributions", export_path),
+            "import_collection": lambda: db_adapter.import_collection("contributions", export_path),
+            f"migrate_backend_to_{migrate_target}": lambda: db_adapter.migrate_backend(backend.split("_")[0], migrate_target),
+            "rescore_contributions_dry_run": lambda: db_adapter.rescore_contributions(dry_run=True),
+        }
+        for name, fn in bulk.items():
+            results[name] = measure(fn, bulk_repeat, client)
+        try:
+            results["rescore_contributions"] = measure(db_adapter.rescore_contributions, bulk_repeat, client, before=flip_musk)
+        finally:
+            restore_musk()
+
+        # 批量删除与级联删除放在最后，不影响前面各项的数据量
+        deletes = {
+            f"delete_many_{BATCH_SIZE}": lambda: db_adapter.delete_many("contributions", saved_batches.pop()),
+            "delete_task_cascade": lambda: db_adapter.delete_task_cascade(next(cascade_tasks)["id"]),
+        }
+        for name, fn in deletes.items():
+            results[name] = measure(fn, repeat, client)
+
+        if with_pages:
+            for name, path in PAGES.items():
+                results[f"{name}_cold"] = measure(lambda: render_page(path), 1, client, before=reset_caches)
+                results[f"{name}_warm"] = measure(lambda: render_page(path), repeat, client)
+    finally:
+        # 释放日志文件锁 / 镜像监听，再删除临时目录
+        if db_adapter._db_client:
+            db_adapter._close_backend(db_adapter._db_client)
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+# ================= 报告 =================
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="db_adapter 存储层与页面加载基准测试")
+    parser.add_argument("--sizes", default="1k,10k", help=f"逗号分隔，可选 {','.join(SIZES)}")
+    parser.add_argument("--backends", default=",".join(BACKENDS), help=f"逗号分隔，可选 {','.join(BACKENDS)}")
+    parser.add_argument("--repeat", type=int, default=5, help="每个操作重复次数 (取中位数)")
+    parser.add_argument("--no-pages", action="store_true", help="跳过页面渲染计时")
+    parser.add_argument("--output", default=os.path.join(ROOT, "bench_report.json"))
+    args = parser.parse_args()
+
+    sizes = [s.strip().lower() for s in args.sizes.split(",") if s.strip()]
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+    for name in sizes:
+        if name not in SIZES:
+            parser.error(f"未知数据量: {name}")
+    for name in backends:
+        if name not in BACKENDS:
+            parser.error(f"未知后端: {name}")
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "pandas": pd.__version__,
+            "duckdb": query_engine.DUCKDB_AVAILABLE,
+            "repeat": args.repeat,
+        },
+        "results": [],
+    }
+    for size_name in sizes:
+        for backend in backends:
+            print(f"▶ {backend} / {size_name} ...", flush=True)
+            for operation, stats in run_case(backend, size_name, args.repeat, not args.no_pages).items():
+                report["results"].append({"backend": backend, "size": size_name, "rows": SIZES[size_name],
+                                          "operation": operation, **stats})
+                print(f"    {operation:<40} {stats['median_ms']:>10.2f} ms", flush=True)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"报告已写入 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+基准测试用的合成数据：按 CATEGORIES / SCORE_CONFIG 生成形状与线上一致的任务和贡献记录
+同一个 seed 生成的数据完全相同，便于不同版本之间对比
+"""
+import random
+import uuid
+from datetime import date, datetime, timedelta
+
+from db_adapter import CATEGORIES, SCORE_CONFIG
+
+USERS = ["张三", "李四", "王五", "赵六", "孙七", "周八", "吴九", "郑十",
+         "陈一", "林二", "黄三", "刘四", "杨五", "徐六", "马七", "朱八"]
+STATUSES = ["进行中"] * 6 + ["已完成"] * 3 + ["暂停"]
+# 每个任务平均对应的贡献条数
+CONTRIBUTIONS_PER_TASK = 20
+
+
+def make_tasks(count, rng):
+    branches = [(c, s) for c, subs in CATEGORIES.items() for s in subs]
+    tasks = []
+    for i in range(count):
+        category, subcategory = rng.choice(branches)
+        creator = rng.choice(USERS)
+        contributors = sorted({creator, *rng.sample(USERS, rng.randint(0, 3))})
+        created = date(2024, 1, 1) + timedelta(days=rng.randint(0, 600))
+        tasks.append({
+            "id": uuid.UUID(int=rng.getrandbits(128)).hex[:8],
+            "creator": creator,
+            "contributors": contributors,
+            "name": f"任务-{i}",
+            "category": category,
+            "subcategory": subcategory,
+            "difficulty": rng.choice(list(SCORE_CONFIG["D_Difficulty"])),
+            "progress": rng.randint(0, 100),
+            "status": rng.choice(STATUSES),
+            "created_at": created.isoformat(),
+            "updated_at": (created + timedelta(days=rng.randint(0, 90))).isoformat(),
+        })
+    return tasks
+
+
+def make_score(rng):
+    b_label = rng.choice(list(SCORE_CONFIG["B_Base"]))
+    d_label = rng.choice(list(SCORE_CONFIG["D_Difficulty"]))
+    m_label = rng.choice(list(SCORE_CONFIG["M_Musk"]))
+    b_val = SCORE_CONFIG["B_Base"][b_label]
+    d_val = SCORE_CONFIG["D_Difficulty"][d_label]
+    m_val = SCORE_CONFIG["M_Musk"][m_label]
+    return {
+        "V": round((b_val * d_val) * m_val, 2),
+        "B_val": b_val, "B_label": b_label,
+        "D_val": d_val, "D_label": d_label,
+        "M_val": m_val, "M_label": m_label,
+    }
+
+
+def make_contributions(count, tasks, rng):
+    contributions = []
+    start = datetime(2024, 1, 1)
+    for _ in range(count):
+        task = rng.choice(tasks)
+        moment = start + timedelta(seconds=rng.randint(0, 730 * 86400))
+        contributions.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "date": moment.strftime("%Y-%m-%d"),
+            "user": rng.choice(task["contributors"]),
+            "task_id": task["id"],
+            "task_name": task["name"],
+            "category": task["category"],
+            "subcategory": task["subcategory"],
+            "score": make_score(rng),
+            "description": "合成数据：完成了阶段性工作",
+            "timestamp": moment.isoformat(),
+        })
+    return contributions
+
+
+def generate(contribution_count, seed=0):
+    """返回 (tasks, contributions)，任务数约为贡献数的 1/CONTRIBUTIONS_PER_TASK"""
+    rng = random.Random(seed)
+    tasks = make_tasks(max(contribution_count // CONTRIBUTIONS_PER_TASK, 1), rng)
+    return tasks, make_contributions(contribution_count, tasks, rng)
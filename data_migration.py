@@ -0,0 +1,55 @@
+"""
+数据备份 / 恢复 / 后端迁移命令行工具 (在项目根目录运行，沿用 secrets.toml 和 MOSQUITO_* 环境变量)
+
+    python data_migration.py export tasks backup/tasks.ndjson
+    python data_migration.py import contributions backup/contributions.parquet
+    python data_migration.py migrate local firebase
+    python data_migration.py migrate firebase local --batch-size 5000
+
+导入/迁移到 local 后端时每提交一批都要重写整个 JSON 文件，宜调大 --batch-size
+
+导入/迁移中断后重新执行同一条命令即可从上次提交处继续
+"""
+import argparse
+
+import db_adapter
+
+
+def main():
+    parser = argparse.ArgumentParser(description="蚊虫识别系统数据导出/导入/迁移")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_export = sub.add_parser("export", help="把一个集合导出为 NDJSON / Parquet")
+    p_export.add_argument("collection", choices=["tasks", "contributions"])
+    p_export.add_argument("path")
+    p_export.add_argument("--format", choices=["ndjson", "parquet"])
+
+    p_import = sub.add_parser("import", help="从 NDJSON / Parquet 导入到当前后端")
+    p_import.add_argument("collection", choices=["tasks", "contributions"])
+    p_import.add_argument("path")
+    p_import.add_argument("--format", choices=["ndjson", "parquet"])
+    p_import.add_argument("--batch-size", type=int, default=db_adapter.FIRESTORE_BATCH_LIMIT,
+                          help="每次提交的条数 (默认 %(default)s)")
+
+    p_migrate = sub.add_parser("migrate", help="在两个后端之间搬迁全部数据")
+    p_migrate.add_argument("source", choices=["local", "log", "sqlite", "firebase"])
+    p_migrate.add_argument("target", choices=["local", "log", "sqlite", "firebase"])
+    p_migrate.add_argument("--batch-size", type=int, default=db_adapter.FIRESTORE_BATCH_LIMIT,
+                           help="每次提交的条数 (默认 %(default)s)")
+
+    args = parser.parse_args()
+    if getattr(args, "batch_size", 1) < 1:
+        parser.error("--batch-size 必须大于 0")
+    if args.command == "export":
+        count = db_adapter.export_collection(args.collection, args.path, args.format)
+        print(f"已导出 {count} 条 -> {args.path}")
+    elif args.command == "import":
+        result = db_adapter.import_collection(args.collection, args.path, args.format, batch_size=args.batch_size)
+        print(f"已导入 {result['imported']} 条 (续传跳过 {result['resumed_from']} 条)")
+    else:
+        for collection_name, result in db_adapter.migrate_backend(args.source, args.target, batch_size=args.batch_size).items():
+            print(f"{collection_name}: 迁移 {result['migrated']} 条 (续传跳过 {result['resumed_from']} 条)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,58 +1,228 @@
+import bisect
 import json
 import os
+import threading
+import time
 import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
 import pandas as pd
 import streamlit as st
+from log_store import LogStore
+from sqlite_store import SqliteStore, INDEXED_FIELDS
+from json_store import JsonGroupWriter
+from firestore_mirror import FirestoreMirror
+from query_engine import ContributionQuery
 
 # 尝试导入 firebase 相关库
 try:
     import firebase_admin
     from firebase_admin import credentials
     from firebase_admin import firestore
+    from google.cloud.firestore_v1.base_query import FieldFilter
     FIREBASE_AVAILABLE = True
 except ImportError:
     FIREBASE_AVAILABLE = False
 
+# 尝试导入 pyarrow (可选，仅导出/导入 Parquet 时需要)
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
 # ================= 数据库连接管理 =================
+# 全进程共享同一个客户端 (Firestore 客户端底层 gRPC 通道本身线程安全)
 _db_client = None
+_db_lock = threading.Lock()
+
+def _storage_setting(key, default=None):
+    # 优先读环境变量 (Docker 部署)，其次读 secrets.toml 中的 [storage] 段
+    env_key = f"MOSQUITO_{key.upper()}"
+    if env_key in os.environ:
+        return os.environ[env_key]
+    try:
+        if "storage" in st.secrets:
+            return st.secrets["storage"].get(key, default)
+    except Exception:
+        pass
+    return default
 
 def get_db():
+    if _db_client:
+        return _db_client
+    # 多个会话线程同时首次访问时只初始化一次
+    with _db_lock:
+        return _init_db()
+
+def _init_db():
     global _db_client
     if _db_client:
         return _db_client
 
     if FIREBASE_AVAILABLE and "firebase" in st.secrets:
         try:
-            if not firebase_admin._apps:
-                key_dict = dict(st.secrets["firebase"])
-                cred = credentials.Certificate(key_dict)
-                firebase_admin.initialize_app(cred)
-            
-            _db_client = {
-                "type": "firebase",
-                "client": firestore.client()
-            }
+            _db_client = _open_backend("firebase")
             return _db_client
         except Exception as e:
             print(f"Firebase 连接失败，回退到本地模式: {e}")
-    
-    _db_client = {
+
+    _db_client = _open_backend(_storage_setting("backend", "local"))
+    return _db_client
+
+def _open_backend(backend, import_legacy=True):
+    """
+    按名字打开一个存储后端 (firebase / log / sqlite / local)，返回 db 字典，不改变当前活动后端
+    import_legacy=False 时新建的 log / sqlite 库不自动导入旧的 JSON 文件 (迁移目标用)
+    """
+    legacy_files = {"tasks": "tasks_db.json", "contributions": "contributions_db.json"} if import_legacy else None
+    if backend == "firebase":
+        if not FIREBASE_AVAILABLE or "firebase" not in st.secrets:
+            raise RuntimeError("Firebase 不可用：缺少 firebase-admin 或 secrets.toml 中的 [firebase] 配置")
+        if not firebase_admin._apps:
+            key_dict = dict(st.secrets["firebase"])
+            cred = credentials.Certificate(key_dict)
+            firebase_admin.initialize_app(cred)
+        
+        client = firestore.client()
+        # 可选的本地镜像模式：监听集合变更，读取全部走内存副本
+        mirror = None
+        if str(_storage_setting("firebase_mirror", "")).lower() in ("1", "true", "yes"):
+            mirror = FirestoreMirror(client, ["tasks", "contributions"])
+        return {
+            "type": "firebase",
+            "client": client,
+            "mirror": mirror
+        }
+
+    if backend == "log":
+        # 追加写日志模式：首次启动时自动导入旧的 JSON 文件
+        return {
+            "type": "log",
+            "store": LogStore(
+                {"tasks": "tasks_db.jsonl", "contributions": "contributions_db.jsonl"},
+                legacy_files=legacy_files,
+                indexes={"contributions": ["task_id"]}
+            )
+        }
+    if backend == "sqlite":
+        # SQLite (WAL) 模式：新建数据库时自动迁移旧的 JSON 文件
+        sqlite_path = _storage_setting("sqlite_path", "mosquito_tracker.db")
+        return {
+            "type": "sqlite",
+            "db_file": sqlite_path,
+            "store": SqliteStore(
+                sqlite_path,
+                legacy_files=legacy_files
+            )
+        }
+
+    return {
         "type": "local",
         "task_file": "tasks_db.json",
-        "contrib_file": "contributions_db.json"
+        "contrib_file": "contributions_db.json",
+        # 所有会话的写入都经过同一个写线程，合并提交
+        "writer": JsonGroupWriter(
+            {"tasks": "tasks_db.json", "contributions": "contributions_db.json"},
+            window=float(_storage_setting("commit_window", 0))
+        )
     }
-    return _db_client
+
+def _close_backend(db):
+    """释放 _open_backend 临时打开的后端：日志模式的文件锁、镜像模式的监听"""
+    if db["type"] == "log":
+        db["store"].close()
+    elif db.get("mirror"):
+        db["mirror"].close()
+
+# ================= 读缓存 (按数据版本失效) =================
+# 进程级缓存：Streamlit 每次 rerun 都会重新执行页面脚本，但模块只导入一次
+# 缓存键为集合名，缓存值带上"数据版本签名"，签名变化即视为失效：
+#   - 本进程内的每次写入都会递增对应集合的写版本号
+#   - 本地文件模式额外比较文件 mtime/size (防止文件被外部修改)
+#   - Firebase 模式额外设置 TTL (其他实例写入的数据也能在 TTL 内可见)
+_data_versions = {}
+_load_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_CACHE_MAX_RECORDS = 200_000
+_FIREBASE_CACHE_TTL = 30
+
+def _local_file(db, collection_name):
+    return db["task_file"] if collection_name == "tasks" else db["contrib_file"]
+
+def _bump_version(collection_name, delta=None):
+    # 必须在写入完成 *之后* 调用，保证并发读者不会把旧数据缓存在新版本号下
+    # delta: 本次写入的增量描述，供物化视图增量维护；None 表示未知 (视图整体失效)
+    #   {"upsert": [item, ...], "delete": [id, ...], "update": [(id, 字段, 值), ...], "delete_task": task_id}
+    # 镜像模式：先把本次写入应用到本地副本，保证紧接着的读取能看到自己的写入
+    if _db_client and _db_client.get("mirror"):
+        _db_client["mirror"].apply_delta(collection_name, delta)
+    with _cache_lock:
+        old_version = _data_versions.get(collection_name, 0)
+        _data_versions[collection_name] = old_version + 1
+        _load_cache.pop(collection_name, None)
+    if collection_name == "contributions":
+        _contrib_view.apply(old_version, delta)
+    _contrib_rollup.apply(collection_name, old_version, delta)
+
+def get_data_version(collection_name):
+    return _data_versions.get(collection_name, 0)
+
+def _file_signature(path):
+    try:
+        st_ = os.stat(path)
+        return (st_.st_mtime_ns, st_.st_size)
+    except OSError:
+        return (None, None)
+
+def _source_signature(db, collection_name):
+    version = get_data_version(collection_name)
+    if db["type"] == "local":
+        return (version,) + _file_signature(_local_file(db, collection_name))
+    if db["type"] == "sqlite":
+        return (version,) + _file_signature(db["db_file"]) + _file_signature(db["db_file"] + "-wal")
+    if db["type"] == "firebase":
+        if db.get("mirror"):
+            # 镜像由监听实时更新，副本版本号变化即失效，不需要 TTL
+            return (version, db["mirror"].version(collection_name))
+        return (version, int(time.time() // _FIREBASE_CACHE_TTL))
+    # log 模式：LogStore 独占日志文件 (其他进程无法同时打开)，内存状态只随本进程写入变化
+    return (version,)
+
+def _cache_put(collection_name, signature, data):
+    with _cache_lock:
+        # 签名已过期 (期间发生了写入) 的结果不入缓存
+        if signature[0] != get_data_version(collection_name):
+            return
+        if len(data) > _CACHE_MAX_RECORDS:
+            return
+        _load_cache[collection_name] = (signature, data)
+        _load_cache.move_to_end(collection_name)
+        # 超出总记录数预算时按 LRU 淘汰
+        while sum(len(v[1]) for v in _load_cache.values()) > _CACHE_MAX_RECORDS:
+            _load_cache.popitem(last=False)
+
+def clear_cache():
+    with _cache_lock:
+        _load_cache.clear()
 
 # ================= 基础 I/O (多态适配) =================
 
-def _load_data(collection_name):
-    db = get_db()
+def _fetch_collection(db, collection_name):
     if db["type"] == "firebase":
+        if db.get("mirror"):
+            data = db["mirror"].load(collection_name)
+            if data is not None:
+                return data
         docs = db["client"].collection(collection_name).stream()
         return [doc.to_dict() for doc in docs]
+    elif db["type"] in ("log", "sqlite"):
+        return db["store"].load(collection_name)
     else:
-        filename = db["task_file"] if collection_name == "tasks" else db["contrib_file"]
+        filename = _local_file(db, collection_name)
         if not os.path.exists(filename):
             return []
         try:
@@ -61,6 +231,131 @@ def _load_data(collection_name):
         except Exception:
             return []
 
+def _cache_get(collection_name, signature):
+    with _cache_lock:
+        hit = _load_cache.get(collection_name)
+        if hit and hit[0] == signature:
+            _load_cache.move_to_end(collection_name)
+            return hit[1]
+    return None
+
+def _match(item, filters):
+    for field, op, value in filters:
+        v = item.get(field)
+        if op == "==":
+            if v != value:
+                return False
+        elif op == "in":
+            if v not in value:
+                return False
+        elif op == "array_contains":
+            if not isinstance(v, list) or value not in v:
+                return False
+        else:
+            raise ValueError(f"不支持的过滤操作符: {op}")
+    return True
+
+def _project(item, fields):
+    return {f: item[f] for f in fields if f in item}
+
+def _query_backend(db, collection_name, filters, fields):
+    """
+    把过滤条件/投影下推到存储层；存储层无法处理的条件在内存中补充过滤
+    返回 None 表示该后端不支持下推 (调用方回退为全量加载)
+    """
+    if db["type"] == "firebase":
+        if db.get("mirror"):
+            # 镜像模式下内存过滤比远程查询更快
+            return None
+        query = db["client"].collection(collection_name)
+        for field, op, value in filters:
+            query = query.where(filter=FieldFilter(field, op, value))
+        if fields:
+            query = query.select(list(fields))
+        return [doc.to_dict() for doc in query.stream()]
+
+    rest = list(filters)
+    if db["type"] == "sqlite":
+        pushed = {}
+        for f in filters:
+            field, op, value = f
+            if op == "==" and field in INDEXED_FIELDS[collection_name]:
+                pushed[field] = value
+            elif op == "array_contains" and collection_name == "tasks" and field == "contributors":
+                pushed[field] = value
+            else:
+                continue
+            rest.remove(f)
+        if not pushed:
+            return None
+        data = db["store"].find(collection_name, pushed)
+    elif db["type"] == "log":
+        indexed = next((f for f in filters if f[1] == "==" and db["store"].is_indexed(collection_name, f[0])), None)
+        if indexed is None:
+            return None
+        rest.remove(indexed)
+        data = db["store"].find(collection_name, indexed[0], indexed[2])
+    else:
+        return None
+    data = [x for x in data if _match(x, rest)]
+    if fields:
+        data = [_project(x, fields) for x in data]
+    return data
+
+def _load_data(collection_name, filters=None, fields=None):
+    """
+    读取集合 (带缓存)
+    filters: [(字段, 操作符, 值)]，操作符支持 "==" / "in" / "array_contains"
+    fields: 只返回这些字段 (Firestore 投影查询，减少传输)
+    缓存命中时直接在内存中过滤；未命中时优先把条件下推到存储层
+    注意：返回的记录对象与缓存共享，修改后必须经 _save_item / update_item_field 写回
+    """
+    db = get_db()
+    signature = _source_signature(db, collection_name)
+    data = _cache_get(collection_name, signature)
+    if data is None and (filters or fields):
+        pushed = _query_backend(db, collection_name, filters or [], fields)
+        if pushed is not None:
+            return pushed
+    if data is None:
+        data = _fetch_collection(db, collection_name)
+        _cache_put(collection_name, signature, data)
+    if filters:
+        data = [x for x in data if _match(x, filters)]
+    else:
+        data = list(data)
+    if fields:
+        data = [_project(x, fields) for x in data]
+    return data
+
+_fetch_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="db-fetch")
+
+def load_collections(collection_names):
+    """
+    同时读取多个集合，返回 {集合名: 记录列表}
+    Firebase 模式下各集合并发请求，总耗时接近最慢的一次读取而不是各次之和；
+    本地模式读取受 GIL 限制，直接顺序执行
+    """
+    db = get_db()
+    if db["type"] != "firebase" or db.get("mirror") or len(collection_names) < 2:
+        return {name: _load_data(name) for name in collection_names}
+    futures = {name: _fetch_pool.submit(_load_data, name) for name in collection_names}
+    return {name: f.result() for name, f in futures.items()}
+
+def _get_item(collection_name, item_id):
+    # 按 id 直接读取单条记录 (Firestore 只产生 1 次文档读取)
+    db = get_db()
+    if db["type"] == "firebase":
+        if db.get("mirror"):
+            item = db["mirror"].get(collection_name, item_id)
+            if item is not None:
+                return dict(item)
+        snap = db["client"].collection(collection_name).document(str(item_id)).get()
+        return snap.to_dict() if snap.exists else None
+    if db["type"] in ("log", "sqlite"):
+        return db["store"].get(collection_name, item_id)
+    return next((x for x in _load_data(collection_name) if str(x.get("id")) == str(item_id)), None)
+
 def _save_item(collection_name, item, item_id=None):
     db = get_db()
     if db["type"] == "firebase":
@@ -71,20 +366,11 @@ def _save_item(collection_name, item, item_id=None):
             db["client"].collection(collection_name).document(str(item_id)).set(item)
         else:
             db["client"].collection(collection_name).add(item)
+    elif db["type"] in ("log", "sqlite"):
+        db["store"].put(collection_name, item, item_id)
     else:
-        data = _load_data(collection_name)
-        if "id" in item:
-            existing_idx = next((i for i, x in enumerate(data) if x.get("id") == item["id"]), -1)
-            if existing_idx >= 0:
-                data[existing_idx] = item
-            else:
-                data.append(item)
-        else:
-            data.append(item)
-        
-        filename = db["task_file"] if collection_name == "tasks" else db["contrib_file"]
-        with open(filename, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        db["writer"].submit(collection_name, "upsert", [item])
+    _bump_version(collection_name, {"upsert": [item]} if "id" in item else None)
 
 # ================= 任务分支管理 =================
 def create_task(creator, name, category, subcategory, difficulty_level="B 级 (常规)", operator=None):
@@ -117,33 +403,470 @@ def get_all_active_tasks():
     return tasks
 
 def get_user_involved_tasks(user):
-    tasks = _load_data("tasks")
-    return [t for t in tasks if t.get("status") == "进行中" and user in t.get("contributors", [])]
+    return _load_data("tasks", filters=[("status", "==", "进行中"), ("contributors", "array_contains", user)])
 
 def join_task(user, task_id):
-    tasks = _load_data("tasks")
-    target_task = next((t for t in tasks if t["id"] == task_id), None)
+    target_task = _get_item("tasks", task_id)
     
     if target_task:
-        contributors = target_task.get("contributors", [])
+        contributors = list(target_task.get("contributors", []))
         if user not in contributors:
             contributors.append(user)
-            target_task["contributors"] = contributors
+            target_task = {**target_task, "contributors": contributors}
             _save_item("tasks", target_task, task_id)
             return True
     return False
 
 def update_task_progress(task_id, new_progress):
-    tasks = _load_data("tasks")
-    target_task = next((t for t in tasks if t["id"] == task_id), None)
+    target_task = _get_item("tasks", task_id)
     
     if target_task:
+        target_task = dict(target_task)
         target_task["progress"] = new_progress
         target_task["updated_at"] = datetime.now().strftime("%Y-%m-%d")
         if new_progress >= 100:
             target_task["status"] = "已完成"
         _save_item("tasks", target_task, task_id)
 
+# ================= 任务索引 (各页面共享) =================
+def progress_bucket(progress):
+    # 与首页卡片配色一致：0 = 滞后 (<30%)，1 = 推进中 (30%~79%)，2 = 接近完成 (>=80%)
+    p = progress or 0
+    if p < 30:
+        return 0
+    if p < 80:
+        return 1
+    return 2
+
+class TaskIndex:
+    """
+    任务列表的只读二级索引，每个 tasks 数据版本只构建一次
+    各分组内保持任务原有顺序
+    """
+
+    def __init__(self, tasks, version=None):
+        self.tasks = tasks
+        self.version = version    # 构建时的 tasks 数据签名 (可作为下游缓存键)
+        self.by_id = {}
+        self.by_branch = {}       # (一级分类, 二级分类) -> [task]
+        self.by_status = {}       # 状态 -> [task]
+        self.by_contributor = {}  # 成员 -> [task]
+        self.by_progress = {}     # 进度分档 -> [task]
+        for t in tasks:
+            if 'id' in t:
+                self.by_id[t['id']] = t
+            self.by_branch.setdefault((t.get('category'), t.get('subcategory')), []).append(t)
+            self.by_status.setdefault(t.get('status', '进行中'), []).append(t)
+            for user in t.get('contributors', []) or []:
+                self.by_contributor.setdefault(user, []).append(t)
+            self.by_progress.setdefault(progress_bucket(t.get('progress')), []).append(t)
+
+    def get(self, task_id):
+        return self.by_id.get(task_id)
+
+    def in_branch(self, category, subcategory):
+        return self.by_branch.get((category, subcategory), [])
+
+    def with_status(self, status):
+        return self.by_status.get(status, [])
+
+    def of_contributor(self, user):
+        return self.by_contributor.get(user, [])
+
+    def in_progress_bucket(self, bucket):
+        return self.by_progress.get(bucket, [])
+
+    def involved(self, user):
+        # 成员参与且进行中的任务 (同 get_user_involved_tasks)
+        return [t for t in self.of_contributor(user) if t.get('status') == '进行中']
+
+    def unclassified(self):
+        # 分类不在 CATEGORIES 结构中的任务
+        known = set((c, sub) for c, subs in CATEGORIES.items() for sub in subs)
+        return [t for key, group in self.by_branch.items() if key not in known for t in group]
+
+_task_index = None
+
+def get_task_index():
+    global _task_index
+    signature = _source_signature(get_db(), "tasks")
+    cached = _task_index
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    index = TaskIndex(_load_data("tasks"), version=signature)
+    _task_index = (signature, index)
+    return index
+
+# ================= 贡献记录物化视图 =================
+CONTRIB_EMPTY_COLUMNS = ["date", "user", "category", "score", "description"]
+
+# 明细宽表各列的存储类型：低基数字符串用 category，日期用 datetime64，分数用 float32
+CONTRIB_SCHEMA = {
+    "user": "category", "category": "category", "subcategory": "category", "task_name": "category",
+    "B_label": "category", "D_label": "category", "M_label": "category",
+    "date": "datetime", "timestamp": "datetime",
+    "V": "float32", "B_val": "float32", "D_val": "float32", "M_val": "float32",
+}
+
+def _normalize_score(s):
+    if isinstance(s, dict): return s
+    # 旧数据：score 直接是一个数字，视为 V
+    if isinstance(s, (int, float)) and not isinstance(s, bool): return {"V": s}
+    return {}
+
+def _to_datetime(series):
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    try:
+        parsed = pd.to_datetime(series, errors="coerce", format="ISO8601")
+    except (ValueError, TypeError):
+        # 混有带时区/不带时区的时间戳：统一按 UTC 解析后去掉时区
+        parsed = pd.to_datetime(series, errors="coerce", utc=True).dt.tz_localize(None)
+    retry = parsed.isna() & series.notna()
+    if retry.any():
+        # 非 ISO 格式的旧数据逐条解析，仍然无法识别的记为 NaT
+        parsed[retry] = pd.to_datetime(series[retry].astype(str), errors="coerce", format="mixed")
+    return parsed
+
+def _iso_day(value):
+    # 单个日期值转成 "YYYY-MM-DD"：ISO 开头的直接截取，旧格式 (如 "2024/03/05") 再解析，无法识别的返回 None
+    if value is None:
+        return None
+    text = str(value)
+    if len(text) >= 10 and text[4] == "-" and text[7] == "-":
+        return text[:10]
+    return _parse_day(text)
+
+@lru_cache(maxsize=4096)
+def _parse_day(text):
+    parsed = pd.to_datetime(text, errors="coerce", format="mixed")
+    return None if pd.isna(parsed) else parsed.strftime("%Y-%m-%d")
+
+def _coerce_column(series, kind):
+    # 把一列转换成 CONTRIB_SCHEMA 规定的类型，已经是目标类型时原样返回
+    if kind == "category":
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            return series
+        return series.where(series.isna(), series.astype(str)).astype("category")
+    if kind == "datetime":
+        return _to_datetime(series)
+    if series.dtype == "float32":
+        return series
+    return pd.to_numeric(series, errors="coerce").astype("float32")
+
+def _apply_contrib_schema(df):
+    for col, kind in CONTRIB_SCHEMA.items():
+        if col in df.columns:
+            df[col] = _coerce_column(df[col], kind)
+    return df
+
+def _concat_contrib_frames(base, upserted):
+    # 合并前先统一两边的类别集合，避免 category 列在 concat 后退化成 object
+    for col, kind in CONTRIB_SCHEMA.items():
+        if kind == "category" and col in base.columns and col in upserted.columns:
+            new = upserted[col].cat.categories.difference(base[col].cat.categories)
+            base[col] = base[col].cat.add_categories(new)
+            upserted[col] = upserted[col].cat.set_categories(base[col].cat.categories)
+    return _apply_contrib_schema(pd.concat([base, upserted]))
+
+def _set_contrib_cell(df, item_id, field, value):
+    # 按列类型写入单个值 (category 列遇到新取值时先扩充类别)
+    kind = CONTRIB_SCHEMA.get(field)
+    if field not in df.columns:
+        df[field] = float("nan") if kind == "float32" else None
+        if kind:
+            df[field] = _coerce_column(df[field], kind)
+    if kind and not pd.isna(value):
+        if kind == "category":
+            value = str(value)
+            if value not in df[field].cat.categories:
+                df[field] = df[field].cat.add_categories([value])
+        elif kind == "datetime":
+            value = _to_datetime(pd.Series([value])).iloc[0]
+        else:
+            value = pd.to_numeric(value, errors="coerce")
+    df.loc[item_id, field] = value
+
+def _contributions_to_frame(records):
+    # 把原始贡献记录转成带类型的宽表：score 字典展开成 V / B_val / D_val ... 列，行索引为记录 id
+    # 非 dict 的损坏记录直接丢弃；各列按 CONTRIB_SCHEMA 转换类型，无法解析的值记为 NaN/NaT
+    # 返回 (DataFrame, score 展开出的列名集合)
+    rows, score_cols = [], set()
+    for record in records:
+        if not isinstance(record, dict):
+            continue
+        row = {k: v for k, v in record.items() if k != "score"}
+        if "score" in record:
+            score = _normalize_score(record["score"])
+            score_cols.update(score)
+            row.update(score)
+        rows.append(row)
+    df = _apply_contrib_schema(pd.DataFrame(rows))
+    if 'id' in df.columns:
+        df.index = df['id'].astype(str)
+        # 同一批次里重复出现的 id 以最后一次为准
+        df = df[~df.index.duplicated(keep="last")]
+    return df, score_cols
+
+class ContributionsView:
+    """
+    贡献记录的列式物化视图 (进程级)
+    - 首次读取时全量构建一次
+    - 之后每次写入通过 _bump_version 传入的 delta 增量更新，不再重新解析全部历史
+    - 新增记录先攒在 _pending 里，读取时一次性合并
+    - 孤儿过滤结果按 (贡献版本, 任务版本) 缓存
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._df = None          # 全部贡献 (含孤儿)，索引为 id
+        self._pending = []       # 尚未合并的新增记录 DataFrame
+        self._score_cols = set() # 由 score 字典展开出的列
+        self._version = None     # 视图对应的 contributions 写版本号
+        self._signature = None   # 视图对应的数据源签名 (检测外部修改)
+        self._result = None      # (签名, 任务签名, 过滤后的 DataFrame)
+
+    def invalidate(self):
+        with self._lock:
+            self._df, self._pending, self._version, self._signature, self._result = None, [], None, None, None
+
+    def _flush(self):
+        if self._pending:
+            upserted = self._pending[0]
+            for frame in self._pending[1:]:
+                upserted = _concat_contrib_frames(upserted, frame)
+            # 同一条记录在两次读取之间可能被写入多次，只保留最后一次
+            upserted = upserted[~upserted.index.duplicated(keep="last")]
+            base = self._df.drop(index=upserted.index, errors="ignore")
+            self._df = _concat_contrib_frames(base, upserted)
+            self._pending = []
+
+    def apply(self, old_version, delta):
+        with self._lock:
+            if self._df is None:
+                return
+            # 视图不是基于写入前的版本构建的 (期间有其他写入)，无法增量，直接失效
+            if delta is None or self._version != old_version:
+                self.invalidate()
+                return
+            if delta.get("delete"):
+                # 一次性删除整批 id：逐条 drop 每次都会复制整张表
+                self._flush()
+                self._df = self._df.drop(index=[str(i) for i in delta["delete"]], errors="ignore")
+            if delta.get("delete_task") is not None and "task_id" in self._df.columns:
+                self._flush()
+                self._df = self._df[self._df["task_id"].astype(str) != str(delta["delete_task"])]
+            for item_id, field, value in delta.get("update", []):
+                self._flush()
+                if str(item_id) not in self._df.index:
+                    continue
+                if field == "score":
+                    # 整个 score 被替换：先清空该行旧的分项，再写入新分项
+                    score = _normalize_score(value)
+                    self._score_cols |= set(score)
+                    for col in self._score_cols:
+                        _set_contrib_cell(self._df, str(item_id), col, score.get(col, float("nan")))
+                else:
+                    _set_contrib_cell(self._df, str(item_id), field, value)
+            if delta.get("upsert"):
+                upserted, score_cols = _contributions_to_frame(delta["upsert"])
+                self._pending.append(upserted)
+                self._score_cols |= score_cols
+            self._version = old_version + 1
+            self._signature = _source_signature(get_db(), "contributions")
+            self._result = None
+
+    def frame(self, copy=True):
+        # copy=False 返回视图内部共享的结果，调用方只能读不能改
+        db = get_db()
+        signature = _source_signature(db, "contributions")
+        task_signature = _source_signature(db, "tasks")
+        with self._lock:
+            if self._df is None or self._signature != signature:
+                # 版本号要在读取之前记下：读取期间发生的写入会让下一次读取重新构建
+                self._version = signature[0]
+                # 贡献和任务 (孤儿过滤要用) 并发拉取，任务列表进入读缓存
+                data = load_collections(["contributions", "tasks"])
+                self._df, self._score_cols = _contributions_to_frame(data["contributions"])
+                self._pending = []
+                self._signature = signature
+                self._result = None
+            if self._result is not None and self._result[:2] == (signature, task_signature):
+                return self._result[2].copy() if copy else self._result[2]
+            self._flush()
+            df = self._df
+            if df.empty or 'task_id' not in df.columns:
+                result = pd.DataFrame(columns=CONTRIB_EMPTY_COLUMNS)
+            else:
+                # 过滤逻辑：只保留 task_id 有效的记录
+                # 如果 task_id 为空或者不在 valid_task_ids 里，说明是孤儿数据或异常数据
+                # 这里我们选择严格过滤：只有关联了有效任务的记录才显示
+                valid_task_ids = set(t['id'] for t in _load_data("tasks", fields=["id"]) if 'id' in t)
+                result = df[df['task_id'].isin(valid_task_ids)].reset_index(drop=True)
+                if result.empty:
+                    result = pd.DataFrame(columns=CONTRIB_EMPTY_COLUMNS)
+            self._result = (signature, task_signature, result)
+            return result.copy() if copy else result
+
+_contrib_view = ContributionsView()
+
+# ================= 贡献汇总表 (写入时增量维护) =================
+class ContributionRollup:
+    """
+    按 (成员, 日期, 场景) 粒度预聚合的贡献汇总：{键: [V 总和, 条数]}，日期键统一为 "YYYY-MM-DD"
+    - 积分榜 (按成员)、趋势图 (按日期+成员)、场景分布 (按场景) 都从这张表再聚合，
+      带成员/日期筛选时也能得到精确结果，看板读取量为 O(成员 × 天数 × 场景)
+    - 每条贡献记录保留 (键, V, task_id)，删除/改分时可以精确扣减
+    - 与 get_contributions 一致，只统计关联到现存任务的记录
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._agg = None        # (user, date, category) -> [V 总和, 条数]
+        self._records = {}      # 贡献 id -> (键, V, task_id)
+        self._by_task = {}      # task_id -> set(贡献 id)
+        self._task_ids = set()  # 现存任务 id
+        self._versions = {}     # 集合名 -> 汇总表对应的写版本号
+        self._signatures = {}   # 集合名 -> 汇总表对应的数据源签名
+
+    def invalidate(self):
+        with self._lock:
+            self._agg, self._records, self._by_task, self._task_ids = None, {}, {}, set()
+            self._versions, self._signatures = {}, {}
+
+    @staticmethod
+    def _score_value(score):
+        # 与物化视图的 V 列口径一致：旧数据的数字 score 视为 V，无法解析的 V 按 0 计入总分但仍计条数
+        try:
+            v = float(_normalize_score(score).get("V"))
+        except (TypeError, ValueError):
+            return 0.0
+        return 0.0 if pd.isna(v) else v
+
+    @classmethod
+    def _entry(cls, item):
+        # 日期键统一成 ISO，看板的日期筛选和首末日期才能按字符串正确比较
+        key = (item.get("user"), _iso_day(item.get("date")), item.get("category"))
+        return key, cls._score_value(item.get("score")), str(item.get("task_id"))
+
+    def _add_to_agg(self, key, v, sign):
+        bucket = self._agg.setdefault(key, [0.0, 0])
+        bucket[0] += sign * v
+        bucket[1] += sign
+        if bucket[1] == 0:
+            del self._agg[key]
+
+    def _remove(self, item_id):
+        old = self._records.pop(item_id, None)
+        if old is None:
+            return
+        key, v, task_id = old
+        self._by_task.get(task_id, set()).discard(item_id)
+        if task_id in self._task_ids:
+            self._add_to_agg(key, v, -1)
+
+    def _add(self, item_id, entry):
+        self._remove(item_id)
+        key, v, task_id = entry
+        self._records[item_id] = entry
+        self._by_task.setdefault(task_id, set()).add(item_id)
+        if task_id in self._task_ids:
+            self._add_to_agg(key, v, 1)
+
+    def _set_task(self, task_id, exists):
+        if (task_id in self._task_ids) == exists:
+            return
+        if exists:
+            self._task_ids.add(task_id)
+        else:
+            self._task_ids.discard(task_id)
+        for item_id in self._by_task.get(task_id, ()):
+            key, v, _ = self._records[item_id]
+            self._add_to_agg(key, v, 1 if exists else -1)
+
+    def _build(self):
+        signatures = {c: _source_signature(get_db(), c) for c in ("contributions", "tasks")}
+        data = load_collections(["contributions", "tasks"])
+        self.invalidate()
+        self._agg = {}
+        self._task_ids = set(str(t["id"]) for t in data["tasks"] if "id" in t)
+        for item in data["contributions"]:
+            if "id" in item:
+                self._add(str(item["id"]), self._entry(item))
+        self._versions = {c: sig[0] for c, sig in signatures.items()}
+        self._signatures = signatures
+
+    def apply(self, collection_name, old_version, delta):
+        with self._lock:
+            if self._agg is None:
+                return
+            if delta is None or self._versions.get(collection_name) != old_version:
+                self.invalidate()
+                return
+            if collection_name == "tasks":
+                for item in delta.get("upsert", []):
+                    self._set_task(str(item["id"]), True)
+                for task_id in delta.get("delete", []):
+                    self._set_task(str(task_id), False)
+            else:
+                for item in delta.get("upsert", []):
+                    self._add(str(item["id"]), self._entry(item))
+                for item_id in delta.get("delete", []):
+                    self._remove(str(item_id))
+                if delta.get("delete_task") is not None:
+                    for item_id in list(self._by_task.get(str(delta["delete_task"]), ())):
+                        self._remove(item_id)
+                for item_id, field, value in delta.get("update", []):
+                    old = self._records.get(str(item_id))
+                    if old is None or field not in ("score", "user", "date", "category", "task_id"):
+                        continue
+                    (user, date, category), v, task_id = old
+                    if field == "score":
+                        v = self._score_value(value)
+                    elif field == "task_id":
+                        task_id = str(value)
+                    else:
+                        user, date, category = {
+                            "user": (value, date, category),
+                            "date": (user, _iso_day(value), category),
+                            "category": (user, date, value),
+                        }[field]
+                    self._add(str(item_id), ((user, date, category), v, task_id))
+            self._versions[collection_name] = old_version + 1
+            self._signatures[collection_name] = _source_signature(get_db(), collection_name)
+
+    def frame(self):
+        """返回汇总表 DataFrame：user / date / category / V / count"""
+        db = get_db()
+        with self._lock:
+            if self._agg is None or any(
+                self._signatures.get(c) != _source_signature(db, c) for c in ("contributions", "tasks")
+            ):
+                self._build()
+            rows = [(u, d, c, v, n) for (u, d, c), (v, n) in self._agg.items()]
+        return pd.DataFrame(rows, columns=["user", "date", "category", "V", "count"])
+
+_contrib_rollup = ContributionRollup()
+
+def get_contribution_rollup():
+    return _contrib_rollup.frame()
+
+# ================= 看板查询引擎 =================
+# (贡献签名, 任务签名) -> ContributionQuery；数据不变时复用同一个引擎 (DuckDB 连接与注册)
+_dashboard_query = None
+
+def get_dashboard_query():
+    """返回基于当前贡献明细和汇总表的查询引擎，看板的筛选/聚合都通过它执行"""
+    global _dashboard_query
+    db = get_db()
+    key = (_source_signature(db, "contributions"), _source_signature(db, "tasks"))
+    cached = _dashboard_query
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    engine = ContributionQuery(_contrib_view.frame(copy=False), _contrib_rollup.frame())
+    _dashboard_query = (key, engine)
+    return engine
+
 # ================= 每日贡献管理 =================
 def add_contribution(user, task_id, task_name, category, subcategory, score_data, description, date=None):
     if date is None:
@@ -165,71 +888,442 @@ def add_contribution(user, task_id, task_name, category, subcategory, score_data
     _save_item("contributions", entry, entry["id"])
     return True
 
+def get_task_contributions(task_id):
+    # 某个任务下的全部贡献记录 (Firestore where 查询 / SQLite、日志模式走 task_id 索引)
+    return _load_data("contributions", filters=[("task_id", "==", str(task_id))])
+
 def get_contributions():
-    # 1. 加载所有贡献
-    data = _load_data("contributions")
-    if not data:
-        return pd.DataFrame(columns=["date", "user", "category", "score", "description"])
-    
-    # 2. 加载所有任务 ID (用于过滤孤儿数据)
-    tasks = _load_data("tasks")
-    valid_task_ids = set(t['id'] for t in tasks if 'id' in t)
-    
-    # 3. 过滤逻辑：只保留 task_id 有效的记录
-    # 如果 task_id 为空或者不在 valid_task_ids 里，说明是孤儿数据或异常数据
-    # 注意：为了兼容性，如果记录里没有 task_id 字段（极老数据），也可以选择保留或过滤
-    # 这里我们选择严格过滤：只有关联了有效任务的记录才显示
-    
-    filtered_data = [d for d in data if d.get('task_id') in valid_task_ids]
-    
-    # 如果过滤后为空
-    if not filtered_data:
-        return pd.DataFrame(columns=["date", "user", "category", "score", "description"])
+    return _contrib_view.frame()
 
-    df = pd.DataFrame(filtered_data)
-    
-    if not df.empty and 'score' in df.columns:
-        def normalize_score(s):
-            if isinstance(s, dict): return s
-            return {}
-        
-        score_df = pd.json_normalize(df['score'].apply(normalize_score))
-        df = pd.concat([df.drop('score', axis=1), score_df], axis=1)
-    
-    return df
+# ================= 分页查询 =================
+# 本地模式的可定位排序索引：[(排序键, id)] 升序 + 对应记录，按数据源签名缓存
+_seek_indexes = {}
+
+def _seek_key(item, order_by):
+    v = item.get(order_by)
+    return (v is not None, v if v is not None else "", str(item.get("id")))
+
+def _seek_index(collection_name, order_by):
+    signature = _source_signature(get_db(), collection_name)
+    cached = _seek_indexes.get((collection_name, order_by))
+    if cached and cached[0] == signature:
+        return cached[1], cached[2]
+    items = sorted((x for x in _load_data(collection_name) if "id" in x), key=lambda x: _seek_key(x, order_by))
+    keys = [_seek_key(x, order_by) for x in items]
+    _seek_indexes[(collection_name, order_by)] = (signature, keys, items)
+    return keys, items
+
+def _firestore_missing_field(col, field, after_id, count):
+    # Firestore 的 order_by 会排除缺少该字段的文档：按文档 id 顺序扫描，挑出缺字段的旧记录
+    # 游标沿文档 id 前进，完整翻完一遍最多把集合读一次
+    found = []
+    while len(found) < count:
+        query = col.order_by("__name__")
+        if after_id is not None:
+            query = query.start_after({"__name__": col.document(str(after_id))})
+        docs = list(query.limit(EXPORT_CHUNK_SIZE).stream())
+        for doc in docs:
+            data = doc.to_dict()
+            if field not in data:
+                found.append(data)
+                if len(found) == count:
+                    break
+        if len(docs) < EXPORT_CHUNK_SIZE:
+            break
+        after_id = docs[-1].id
+    return found
+
+def list_contributions(order_by="timestamp", limit=50, cursor=None, descending=True):
+    """
+    游标分页读取贡献记录，返回 (本页记录, 下一页游标)；没有下一页时游标为 None
+    cursor: 上一次返回的游标 {"value": 排序字段值, "id": 记录 id}，None 表示第一页
+    Firebase 用 order_by + start_after，SQLite 用索引列 keyset 分页，其余模式用内存排序索引二分定位
+    缺少排序字段的旧记录：其他模式按空值排序 (升序在最前、降序在最后)；
+    Firebase 无法按"字段不存在"排序，这些记录统一排在最后，按文档 id 顺序列出 (游标带 "missing": True)
+    """
+    db = get_db()
+    if db["type"] == "firebase" and not db.get("mirror"):
+        col = db["client"].collection("contributions")
+        if cursor is not None and cursor.get("missing"):
+            items = _firestore_missing_field(col, order_by, cursor["id"], limit + 1)
+        else:
+            direction = firestore.Query.DESCENDING if descending else firestore.Query.ASCENDING
+            # 显式按文档 id 打破并列，游标直接由 (排序字段值, 文档引用) 构成：不多读一次文档，文档已被删除也能续页
+            query = col.order_by(order_by, direction=direction).order_by("__name__", direction=direction)
+            if cursor is not None:
+                query = query.start_after({order_by: cursor["value"], "__name__": col.document(str(cursor["id"]))})
+            items = [doc.to_dict() for doc in query.limit(limit + 1).stream()]
+            if len(items) <= limit:
+                # 有序部分已取完，用缺字段的旧记录补满本页
+                items += _firestore_missing_field(col, order_by, None, limit + 1 - len(items))
+    elif db["type"] == "sqlite" and order_by in INDEXED_FIELDS["contributions"]:
+        after = (cursor["value"], str(cursor["id"])) if cursor is not None else None
+        items = db["store"].page("contributions", order_by, limit + 1, after, descending)
+    else:
+        keys, sorted_items = _seek_index("contributions", order_by)
+        if descending:
+            end = len(keys) if cursor is None else bisect.bisect_left(keys, _seek_key({order_by: cursor["value"], "id": cursor["id"]}, order_by))
+            items = sorted_items[max(end - limit - 1, 0):end][::-1]
+        else:
+            start = 0 if cursor is None else bisect.bisect_right(keys, _seek_key({order_by: cursor["value"], "id": cursor["id"]}, order_by))
+            items = sorted_items[start:start + limit + 1]
+
+    has_more = len(items) > limit
+    items = items[:limit]
+    next_cursor = None
+    if has_more and items:
+        next_cursor = {"value": items[-1].get(order_by), "id": items[-1].get("id")}
+        if db["type"] == "firebase" and not db.get("mirror") and order_by not in items[-1]:
+            next_cursor["missing"] = True
+    return items, next_cursor
 
 # ================= 数据删除/修正接口 =================
 def delete_item(collection_name, item_id):
     db = get_db()
     if db["type"] == "firebase":
         db["client"].collection(collection_name).document(str(item_id)).delete()
-        return True
+        deleted = True
+    elif db["type"] in ("log", "sqlite"):
+        deleted = db["store"].delete(collection_name, item_id)
     else:
-        data = _load_data(collection_name)
-        new_data = [d for d in data if str(d.get("id")) != str(item_id)]
-        if len(new_data) == len(data):
+        deleted = db["writer"].submit(collection_name, "delete", [item_id]) > 0
+        if not deleted:
             return False
-        filename = db["task_file"] if collection_name == "tasks" else db["contrib_file"]
-        with open(filename, "w", encoding="utf-8") as f:
-            json.dump(new_data, f, ensure_ascii=False, indent=2)
-        return True
+    _bump_version(collection_name, {"delete": [item_id]})
+    return deleted
 
 def update_item_field(collection_name, item_id, field, value):
     db = get_db()
     if db["type"] == "firebase":
         db["client"].collection(collection_name).document(str(item_id)).update({field: value})
+    elif db["type"] in ("log", "sqlite"):
+        db["store"].update_field(collection_name, item_id, field, value)
     else:
-        data = _load_data(collection_name)
-        found = False
-        for d in data:
-            if str(d.get("id")) == str(item_id):
-                d[field] = value
-                found = True
-                break
-        if found:
-            filename = db["task_file"] if collection_name == "tasks" else db["contrib_file"]
-            with open(filename, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+        if not db["writer"].submit(collection_name, "update", (item_id, field, value)):
+            return
+    _bump_version(collection_name, {"update": [(item_id, field, value)]})
+
+# ================= 批量写入 =================
+FIRESTORE_BATCH_LIMIT = 500  # Firestore 单个 WriteBatch 最多 500 个操作
+
+def _chunks(seq, size):
+    for i in range(0, len(seq), size):
+        yield seq[i:i + size]
+
+def save_many(collection_name, items):
+    """
+    批量写入 (按 id 覆盖/追加)
+    本地 JSON 只重写一次文件；日志/SQLite 一次提交；Firebase 按 500 条分批 commit
+    """
+    items = list(items)
+    if not items:
+        return 0
+    _write_many(get_db(), collection_name, items)
+    _bump_version(collection_name, {"upsert": items} if all("id" in item for item in items) else None)
+    return len(items)
+
+def _write_many(db, collection_name, items):
+    # 把一批记录写进指定后端 (不处理版本号/缓存，由调用方负责)
+    if db["type"] == "firebase":
+        client = db["client"]
+        col = client.collection(collection_name)
+        for chunk in _chunks(items, FIRESTORE_BATCH_LIMIT):
+            batch = client.batch()
+            for item in chunk:
+                ref = col.document(str(item["id"])) if "id" in item else col.document()
+                batch.set(ref, item)
+            batch.commit()
+    elif db["type"] in ("log", "sqlite"):
+        db["store"].put_many(collection_name, [(item, None) for item in items])
+    else:
+        db["writer"].submit(collection_name, "upsert", items)
+
+def delete_many(collection_name, item_ids):
+    """批量删除，返回删除条数 (Firebase 模式返回提交的删除操作数)"""
+    item_ids = [str(i) for i in item_ids]
+    if not item_ids:
+        return 0
+    db = get_db()
+    if db["type"] == "firebase":
+        client = db["client"]
+        col = client.collection(collection_name)
+        for chunk in _chunks(item_ids, FIRESTORE_BATCH_LIMIT):
+            batch = client.batch()
+            for item_id in chunk:
+                batch.delete(col.document(item_id))
+            batch.commit()
+        deleted = len(item_ids)
+    elif db["type"] in ("log", "sqlite"):
+        deleted = db["store"].delete_many(collection_name, item_ids)
+    else:
+        deleted = db["writer"].submit(collection_name, "delete", item_ids)
+        if not deleted:
+            return 0
+    _bump_version(collection_name, {"delete": item_ids})
+    return deleted
+
+def delete_task_cascade(task_id):
+    """
+    删除任务及其全部贡献记录，返回 {"tasks": 删除任务数, "contributions": 删除贡献数}
+    关联贡献通过 task_id 索引定位 (Firestore where 查询 / SQLite 索引 / 日志内存索引)
+    """
+    task_id = str(task_id)
+    db = get_db()
+    if db["type"] == "firebase":
+        client = db["client"]
+        task_ref = client.collection("tasks").document(task_id)
+        if db.get("mirror"):
+            # 镜像模式：直接从本地副本找出关联贡献，不产生读取
+            contribs = _load_data("contributions", filters=[("task_id", "==", task_id)], fields=["id"])
+            refs = [client.collection("contributions").document(str(c["id"])) for c in contribs if "id" in c]
+            task_exists = _get_item("tasks", task_id) is not None
+        else:
+            # 只投影 __name__：返回文档引用，不下载贡献内容 (注意 select([]) 是空投影，会返回全部字段)
+            query = client.collection("contributions").where(filter=FieldFilter("task_id", "==", task_id)).select(["__name__"])
+            refs = [doc.reference for doc in query.stream()]
+            task_exists = task_ref.get().exists
+        # 任务放在最后一批：即使中途失败，任务仍在，可重试
+        ops = refs + [task_ref]
+        for chunk in _chunks(ops, FIRESTORE_BATCH_LIMIT):
+            batch = client.batch()
+            for ref in chunk:
+                batch.delete(ref)
+            batch.commit()
+        counts = {"tasks": int(task_exists), "contributions": len(refs)}
+    elif db["type"] == "sqlite":
+        tasks, contributions = db["store"].delete_task_cascade(task_id)
+        counts = {"tasks": tasks, "contributions": contributions}
+    elif db["type"] == "log":
+        store = db["store"]
+        contributions = store.delete_many("contributions", store.find_ids("contributions", "task_id", task_id))
+        counts = {"tasks": int(store.delete("tasks", task_id)), "contributions": contributions}
+    else:
+        writer = db["writer"]
+        contributions = writer.submit("contributions", "delete_where", ("task_id", task_id))
+        counts = {"tasks": writer.submit("tasks", "delete", [task_id]), "contributions": contributions}
+    _bump_version("contributions", {"delete_task": task_id})
+    _bump_version("tasks", {"delete": [task_id]})
+    return counts
+
+# ================= 批量导出 / 导入 / 迁移 =================
+# 流式处理：任何时刻内存中只有一块记录，写入按批提交 (Firebase 每批一次 batch commit)
+# 导入/迁移在旁边维护一个进度文件，中断后重跑会跳过已提交的记录；全部完成后删除进度文件
+# 注意：本地 JSON 后端每提交一批都要重写整个文件，导入/迁移到 local 时宜调大 batch_size
+EXPORT_CHUNK_SIZE = 1000
+
+def iter_collection(collection_name, chunk_size=EXPORT_CHUNK_SIZE, db=None):
+    """
+    分块遍历集合的全部记录，每次产出一个 list
+    Firebase 按文档 id 排序分页拉取；SQLite 按写入顺序分页；
+    日志模式本身常驻内存；本地 JSON 文件是单个数组，只能整体解析后再分块
+    """
+    db = db or get_db()
+    if db["type"] == "firebase":
+        col = db["client"].collection(collection_name)
+        last = None
+        while True:
+            query = col.order_by("__name__").limit(chunk_size)
+            if last is not None:
+                query = query.start_after(last)
+            docs = list(query.stream())
+            if not docs:
+                return
+            last = docs[-1]
+            yield [doc.to_dict() for doc in docs]
+    elif db["type"] == "sqlite":
+        yield from db["store"].iter_docs(collection_name, chunk_size)
+    else:
+        items = db["store"].load(collection_name) if db["type"] == "log" else _fetch_collection(db, collection_name)
+        for chunk in _chunks(items, chunk_size):
+            yield chunk
+
+def _file_format(path, fmt):
+    fmt = fmt or ("parquet" if str(path).endswith(".parquet") else "ndjson")
+    if fmt not in ("ndjson", "parquet"):
+        raise ValueError(f"不支持的格式: {fmt}")
+    if fmt == "parquet" and not PYARROW_AVAILABLE:
+        raise RuntimeError("导出/导入 Parquet 需要安装 pyarrow")
+    return fmt
+
+# Parquet 中每条记录存为 (id, JSON 文档)：两个集合的字段不固定 (score 为嵌套字典)，整行 JSON 保证无损往返
+_PARQUET_SCHEMA = pa.schema([("id", pa.string()), ("doc", pa.string())]) if PYARROW_AVAILABLE else None
+
+def export_collection(collection_name, path, fmt=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """把集合流式导出为 NDJSON (每行一条) 或 Parquet 文件，返回导出条数"""
+    fmt = _file_format(path, fmt)
+    count = 0
+    tmp_path = path + ".tmp"
+    if fmt == "ndjson":
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for chunk in iter_collection(collection_name, chunk_size):
+                f.writelines(json.dumps(item, ensure_ascii=False) + "\n" for item in chunk)
+                count += len(chunk)
+    else:
+        with pq.ParquetWriter(tmp_path, _PARQUET_SCHEMA, compression="zstd") as writer:
+            for chunk in iter_collection(collection_name, chunk_size):
+                writer.write_table(pa.table({
+                    "id": [str(item.get("id", "")) for item in chunk],
+                    "doc": [json.dumps(item, ensure_ascii=False) for item in chunk],
+                }, schema=_PARQUET_SCHEMA))
+                count += len(chunk)
+    os.replace(tmp_path, path)
+    return count
+
+def _iter_file(path, fmt, chunk_size):
+    if fmt == "ndjson":
+        chunk = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    chunk.append(json.loads(line))
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+        if chunk:
+            yield chunk
+    else:
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=["doc"]):
+            yield [json.loads(doc) for doc in batch.column(0).to_pylist()]
+
+def _read_progress(progress_file):
+    try:
+        with open(progress_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _write_progress(progress_file, progress):
+    with open(progress_file + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(progress, f)
+    os.replace(progress_file + ".tmp", progress_file)
+
+def _copy_chunks(chunks, collection_name, target, progress_file, progress, batch_size):
+    # 把分块数据按批写进目标后端，每提交一批更新一次进度；返回 (本次写入条数, 因续传跳过的条数)
+    done = progress.get(collection_name, 0)
+    seen = written = 0
+    for chunk in chunks:
+        if seen + len(chunk) <= done:
+            seen += len(chunk)
+            continue
+        chunk = chunk[max(done - seen, 0):]
+        seen = max(seen, done)
+        for batch in _chunks(chunk, batch_size):
+            if target is None:
+                save_many(collection_name, batch)
+            else:
+                _write_many(target, collection_name, batch)
+            seen += len(batch)
+            written += len(batch)
+            progress[collection_name] = seen
+            _write_progress(progress_file, progress)
+    return written, done
+
+def import_collection(collection_name, path, fmt=None, batch_size=FIRESTORE_BATCH_LIMIT):
+    """
+    从 NDJSON / Parquet 文件流式导入到当前后端 (按 id 覆盖/追加)
+    返回 {"imported": 本次写入条数, "resumed_from": 续传跳过的条数}
+    """
+    fmt = _file_format(path, fmt)
+    progress_file = path + ".progress"
+    progress = _read_progress(progress_file)
+    written, done = _copy_chunks(_iter_file(path, fmt, batch_size), collection_name, None,
+                                 progress_file, progress, batch_size)
+    if os.path.exists(progress_file):
+        os.remove(progress_file)
+    return {"imported": written, "resumed_from": done}
+
+def migrate_backend(source, target, collections=("tasks", "contributions"),
+                    chunk_size=EXPORT_CHUNK_SIZE, batch_size=FIRESTORE_BATCH_LIMIT):
+    """
+    在两个后端之间搬迁数据 (如 "local" -> "firebase")，源后端只读
+    进度记录在 migrate_<源>_to_<目标>.progress，中断后重跑从上次提交处继续
+    返回 {集合名: {"migrated": 本次写入条数, "resumed_from": 续传跳过的条数}}
+    """
+    if source == target:
+        raise ValueError("源后端和目标后端相同")
+    active = get_db()
+    source_db = active if active["type"] == source else _open_backend(source)
+    try:
+        # 目标是当前活动后端时走 save_many，读缓存和物化视图随之更新
+        # 新建的目标库不能再自动导入本地旧 JSON，否则会混进源后端之外的数据
+        target_db = None if active["type"] == target else _open_backend(target, import_legacy=False)
+        try:
+            progress_file = f"migrate_{source}_to_{target}.progress"
+            progress = _read_progress(progress_file)
+            report = {}
+            for collection_name in collections:
+                written, done = _copy_chunks(iter_collection(collection_name, chunk_size, db=source_db),
+                                             collection_name, target_db, progress_file, progress, batch_size)
+                report[collection_name] = {"migrated": written, "resumed_from": done}
+            if os.path.exists(progress_file):
+                os.remove(progress_file)
+            return report
+        finally:
+            if target_db is not None:
+                _close_backend(target_db)
+    finally:
+        if source_db is not active:
+            _close_backend(source_db)
+
+# ================= 批量重算得分 =================
+# SCORE_CONFIG 中的维度 -> (score 中的选项字段, 数值字段)
+SCORE_COMPONENTS = {"B_Base": ("B_label", "B_val"), "D_Difficulty": ("D_label", "D_val"), "M_Musk": ("M_label", "M_val")}
+
+def rescore_contributions(dry_run=False, batch_size=FIRESTORE_BATCH_LIMIT):
+    """
+    按当前 SCORE_CONFIG 重算全部贡献记录的 V = (B * D) * M
+    - 各维度优先用记录里保存的选项名在 SCORE_CONFIG 中查新系数，选项已不存在时沿用保存的数值
+    - 三个维度缺任意一个的记录 (旧数据只有 V) 无法重算，计入 skipped
+    - 整列向量化计算，只把有变化的记录按 batch_size 分批经 save_many 写回；dry_run=True 只计算不写入
+    返回 {"total", "changed", "skipped", "delta_v", "changes": DataFrame(id/user/date/old_V/new_V)}
+    """
+    records = [r for r in _load_data("contributions") if "id" in r]
+    scores = pd.DataFrame([_normalize_score(r.get("score")) for r in records], index=range(len(records)))
+
+    missing = pd.Series(float("nan"), index=scores.index)
+
+    def column(name):
+        return pd.to_numeric(scores[name], errors="coerce") if name in scores.columns else missing
+
+    new_values = {}
+    for dimension, (label_col, val_col) in SCORE_COMPONENTS.items():
+        value = scores[label_col].map(SCORE_CONFIG[dimension]) if label_col in scores.columns else missing
+        new_values[val_col] = pd.to_numeric(value, errors="coerce").fillna(column(val_col))
+    new_v = ((new_values["B_val"] * new_values["D_val"]) * new_values["M_val"]).round(2)
+    new_values["V"] = new_v
+
+    valid = new_v.notna()
+    changed = pd.Series(False, index=scores.index)
+    for col, value in new_values.items():
+        old = column(col)
+        changed |= ~((old - value).abs() < 1e-9)
+    changed &= valid
+    old_v = column("V")
+
+    rows = changed[changed].index
+    items = []
+    for i in rows:
+        record = records[i]
+        score = {**_normalize_score(record.get("score")), **{col: float(new_values[col][i]) for col in new_values}}
+        items.append({**record, "score": score})
+    if not dry_run:
+        for chunk in _chunks(items, batch_size):
+            save_many("contributions", chunk)
+
+    changes = pd.DataFrame({
+        "id": [records[i]["id"] for i in rows],
+        "user": [records[i].get("user") for i in rows],
+        "date": [records[i].get("date") for i in rows],
+        "old_V": old_v[rows].to_numpy(),
+        "new_V": new_v[rows].to_numpy(),
+    })
+    return {
+        "total": len(records),
+        "changed": len(items),
+        "skipped": int((~valid).sum()),
+        "delta_v": float((new_v[rows] - old_v[rows].fillna(0)).sum()),
+        "changes": changes,
+    }
 
 # ================= 配置 =================
 CATEGORIES = {
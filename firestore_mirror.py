@@ -0,0 +1,80 @@
+import threading
+
+
+class FirestoreMirror:
+    """
+    Firestore 集合的进程级本地副本
+    - 每个集合注册一个 on_snapshot 监听，服务端的增删改实时推送到内存副本
+    - 读取直接走副本，不产生网络往返，也不产生 Firestore 读计费
+    - 本进程的写入仍然直接写 Firestore，同时立即应用到副本 (读己之写)；
+      监听推送回来的相同内容不会再次改变副本版本号
+    """
+
+    def __init__(self, client, collection_names, ready_timeout=30):
+        self._client = client
+        self._ready_timeout = ready_timeout
+        self._lock = threading.RLock()
+        self._docs = {c: {} for c in collection_names}        # 集合名 -> {文档 id: dict}
+        self._versions = {c: 0 for c in collection_names}     # 副本内容每变化一次 +1
+        self._ready = {c: threading.Event() for c in collection_names}
+        self._watches = [
+            client.collection(c).on_snapshot(self._listener(c)) for c in collection_names
+        ]
+
+    def _listener(self, collection_name):
+        def on_snapshot(col_snapshot, changes, read_time):
+            with self._lock:
+                docs = self._docs[collection_name]
+                changed = False
+                for change in changes:
+                    doc_id = change.document.id
+                    if change.type.name == "REMOVED":
+                        changed = docs.pop(doc_id, None) is not None or changed
+                    else:
+                        data = change.document.to_dict()
+                        if docs.get(doc_id) != data:
+                            docs[doc_id] = data
+                            changed = True
+                if changed:
+                    self._versions[collection_name] += 1
+            self._ready[collection_name].set()
+        return on_snapshot
+
+    def version(self, collection_name):
+        return self._versions[collection_name]
+
+    def load(self, collection_name):
+        """返回副本中的全部文档；首次同步尚未完成 (超时) 时返回 None"""
+        if not self._ready[collection_name].wait(self._ready_timeout):
+            return None
+        with self._lock:
+            return list(self._docs[collection_name].values())
+
+    def get(self, collection_name, doc_id):
+        if not self._ready[collection_name].wait(self._ready_timeout):
+            return None
+        with self._lock:
+            return self._docs[collection_name].get(str(doc_id))
+
+    def apply_delta(self, collection_name, delta):
+        """把本进程刚写入 Firestore 的变更同步应用到副本 (delta 格式同 db_adapter._bump_version)"""
+        if delta is None or collection_name not in self._docs:
+            return
+        with self._lock:
+            docs = self._docs[collection_name]
+            for item in delta.get("upsert", []):
+                docs[str(item["id"])] = dict(item)
+            for doc_id in delta.get("delete", []):
+                docs.pop(str(doc_id), None)
+            for doc_id, field, value in delta.get("update", []):
+                if str(doc_id) in docs:
+                    docs[str(doc_id)] = {**docs[str(doc_id)], field: value}
+            if delta.get("delete_task") is not None:
+                task_id = str(delta["delete_task"])
+                for doc_id in [k for k, v in docs.items() if str(v.get("task_id")) == task_id]:
+                    del docs[doc_id]
+            self._versions[collection_name] += 1
+
+    def close(self):
+        for watch in self._watches:
+            watch.unsubscribe()
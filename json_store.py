@@ -0,0 +1,162 @@
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+def _file_signature(path):
+    try:
+        st_ = os.stat(path)
+        return (st_.st_mtime_ns, st_.st_size)
+    except OSError:
+        return None
+
+
+class JsonGroupWriter:
+    """
+    本地 JSON 文件的单写线程 (group commit)
+    - 所有会话的写请求进入同一个队列，由唯一的写线程串行处理，不再丢失并发更新
+    - 写线程每次取走队列中积压的全部请求，合并成一次"临时文件 + 原子替换"
+    - 调用方阻塞到自己的请求所在的那次提交落盘后才返回
+    """
+
+    def __init__(self, paths, window=0.0):
+        # paths: {集合名: JSON 文件路径}
+        # window: 收到第一个请求后额外等待的秒数，用来攒更多请求 (0 表示只合并已积压的请求)
+        self._paths = dict(paths)
+        self._window = window
+        self._queue = queue.Queue()
+        self._snapshots = {}   # 集合名 -> (文件签名, 数据)，文件未被外部修改时免去重新解析
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, collection_name, op, payload):
+        """
+        提交一个写操作并等待落盘，返回该操作的结果
+        op: "upsert" (payload=[item]) -> 写入条数
+            "delete" (payload=[id]) -> 删除条数
+            "update" (payload=(id, 字段, 值)) -> 是否找到
+            "delete_where" (payload=(字段, 值)) -> 删除条数
+        """
+        self._ensure_started()
+        fut = Future()
+        self._queue.put((collection_name, op, payload, fut))
+        return fut.result()
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="json-writer", daemon=True)
+                self._thread.start()
+
+    # ---------- 写线程 ----------
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self._window
+            while True:
+                try:
+                    timeout = deadline - time.monotonic()
+                    batch.append(self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            by_collection = {}
+            for entry in batch:
+                by_collection.setdefault(entry[0], []).append(entry)
+            for collection_name, entries in by_collection.items():
+                try:
+                    results = self._commit(collection_name, entries)
+                except Exception as e:
+                    self._snapshots.pop(collection_name, None)
+                    for entry in entries:
+                        entry[3].set_exception(e)
+                else:
+                    for entry, result in zip(entries, results):
+                        entry[3].set_result(result)
+
+    def _read(self, collection_name):
+        path = self._paths[collection_name]
+        signature = _file_signature(path)
+        cached = self._snapshots.get(collection_name)
+        if cached and cached[0] == signature:
+            return list(cached[1])
+        if signature is None:
+            return []
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return []
+
+    def _commit(self, collection_name, entries):
+        data = self._read(collection_name)
+        pos = {str(x["id"]): i for i, x in enumerate(data) if "id" in x}
+        results = []
+        changed = False
+
+        for _, op, payload, _ in entries:
+            if op == "upsert":
+                for item in payload:
+                    key = str(item["id"]) if "id" in item else None
+                    if key in pos:
+                        data[pos[key]] = item
+                    else:
+                        if key is not None:
+                            pos[key] = len(data)
+                        data.append(item)
+                results.append(len(payload))
+                changed = changed or bool(payload)
+            elif op == "delete":
+                count = 0
+                for item_id in payload:
+                    i = pos.pop(str(item_id), None)
+                    if i is not None:
+                        data[i] = None
+                        count += 1
+                results.append(count)
+                changed = changed or count > 0
+            elif op == "update":
+                item_id, field, value = payload
+                i = pos.get(str(item_id))
+                if i is not None:
+                    data[i] = {**data[i], field: value}
+                results.append(i is not None)
+                changed = changed or i is not None
+            elif op == "delete_where":
+                field, value = payload
+                count = 0
+                for i, x in enumerate(data):
+                    if x is not None and str(x.get(field)) == str(value):
+                        data[i] = None
+                        pos.pop(str(x.get("id")), None)
+                        count += 1
+                results.append(count)
+                changed = changed or count > 0
+            else:
+                raise ValueError(f"未知写操作: {op}")
+
+        if changed:
+            data = [x for x in data if x is not None]
+            self._write(collection_name, data)
+        return results
+
+    def _write(self, collection_name, data):
+        path = self._paths[collection_name]
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.replace(tmp_path, path)
+        except OSError:
+            # docker-compose 以单文件方式挂载数据文件时无法对挂载点 rename，退回原地覆盖写
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.remove(tmp_path)
+        self._snapshots[collection_name] = (_file_signature(path), data)
@@ -0,0 +1,300 @@
+import json
+import os
+import threading
+import uuid
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def _lock_exclusive(lock_path):
+    """非阻塞地独占 lock_path，已被其他进程持有时立即报错；返回需要一直持有的文件句柄"""
+    handle = open(lock_path, "a+")
+    try:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        handle.close()
+        raise RuntimeError(f"日志文件正被另一个进程 (或本进程中未关闭的 LogStore) 使用 ({lock_path})，请先停止该进程 (如正在运行的应用) 再重试")
+    return handle
+
+
+class LogStore:
+    """
+    追加写日志存储 (每个集合一个 .jsonl 文件)
+    - 每次写入只追加一行记录，代价 O(1)，与历史数据量无关
+    - 打开时回放日志重建内存状态
+    - 日志中失效记录过多时，后台线程压缩成只含最新状态的新日志
+    - 可选的内存二级索引 (字段值 -> id 集合)，按字段等值查找不必全量扫描
+    - 内存状态即权威数据，只允许一个进程打开同一份日志：打开时独占 <日志>.lock，
+      否则另一个进程追加的记录既读不到，也会在下一次压缩时被覆盖掉
+    """
+
+    def __init__(self, paths, legacy_files=None, indexes=None, compact_min=1000, compact_ratio=2.0, fsync=False):
+        # paths: {集合名: 日志文件路径}
+        # legacy_files: {集合名: 旧版 JSON 文件}，日志不存在时一次性导入
+        # indexes: {集合名: [字段, ...]}，需要建立二级索引的字段
+        self._paths = dict(paths)
+        self._indexed_fields = dict(indexes or {})
+        self._index = {}       # 集合名 -> {字段: {值: set(id)}}
+        self._compact_min = compact_min
+        self._compact_ratio = compact_ratio
+        self._fsync = fsync
+        self._lock = threading.RLock()
+        self._state = {}       # 集合名 -> {id: item} (dict 保持插入顺序)
+        self._log_lines = {}   # 集合名 -> 当前日志行数
+        self._handles = {}     # 集合名 -> 追加写文件句柄
+        self._pending = {}     # 集合名 -> 压缩期间新写入的日志行 (None 表示未在压缩)
+        self._closed = False
+        # 锁加在单独的文件上：压缩时日志文件会被 os.replace 替换
+        self._file_locks = [_lock_exclusive(path + ".lock") for path in self._paths.values()]
+
+        legacy_files = legacy_files or {}
+        for collection_name, path in self._paths.items():
+            if not os.path.exists(path) and os.path.exists(legacy_files.get(collection_name, "")):
+                self._import_legacy(path, legacy_files[collection_name])
+            self._state[collection_name], self._log_lines[collection_name], valid_size = self._replay(path)
+            self._truncate_tail(path, valid_size)
+            self._handles[collection_name] = open(path, "a", encoding="utf-8")
+            self._pending[collection_name] = None
+            self._index[collection_name] = {f: {} for f in self._indexed_fields.get(collection_name, [])}
+            for key, item in self._state[collection_name].items():
+                self._index_add(collection_name, key, item)
+
+    # ---------- 启动: 回放 / 迁移 ----------
+    @staticmethod
+    def _replay(path):
+        # 返回 (状态, 有效行数, 有效字节数)；有效字节数之后是崩溃时只写了一半的尾行
+        state = {}
+        lines = 0
+        valid_size = 0
+        if not os.path.exists(path):
+            return state, lines, valid_size
+        with open(path, "rb") as f:
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    # 没有换行结尾的最后一行：完整的 JSON 仍然回放，写到一半的丢弃
+                    try:
+                        rec = json.loads(raw)
+                    except ValueError:
+                        break
+                    lines += 1
+                    LogStore._apply(state, rec)
+                    valid_size += len(raw)
+                    break
+                valid_size += len(raw)
+                line = raw.strip()
+                if not line:
+                    continue
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue
+                lines += 1
+                LogStore._apply(state, rec)
+        return state, lines, valid_size
+
+    @staticmethod
+    def _truncate_tail(path, valid_size):
+        # 截掉写了一半的尾行，并保证文件以换行结尾，否则下一次追加会和残行拼成一行、重启后丢失
+        if not os.path.exists(path):
+            return
+        with open(path, "rb+") as f:
+            f.truncate(valid_size)
+            if valid_size:
+                f.seek(valid_size - 1)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+
+    @staticmethod
+    def _apply(state, rec):
+        op = rec.get("op")
+        if op == "put":
+            key = rec["id"]
+            # 覆盖写保持原有位置，新 id 追加到末尾 (与 JSON 模式的顺序一致)
+            state[key] = rec["item"]
+        elif op == "del":
+            state.pop(rec["id"], None)
+        elif op == "set":
+            item = state.get(rec["id"])
+            if item is not None:
+                item[rec["field"]] = rec["value"]
+
+    @staticmethod
+    def _import_legacy(path, legacy_file):
+        try:
+            with open(legacy_file, "r", encoding="utf-8") as f:
+                items = json.load(f)
+        except Exception:
+            return
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for item in items:
+                key = str(item["id"]) if "id" in item else uuid.uuid4().hex
+                f.write(json.dumps({"op": "put", "id": key, "item": item}, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, path)
+
+    # ---------- 二级索引 ----------
+    def _index_add(self, collection_name, key, item):
+        for field, postings in self._index[collection_name].items():
+            postings.setdefault(item.get(field), set()).add(key)
+
+    def _index_remove(self, collection_name, key, item):
+        for field, postings in self._index[collection_name].items():
+            keys = postings.get(item.get(field))
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del postings[item.get(field)]
+
+    # ---------- 写日志 ----------
+    def _append(self, collection_name, records):
+        lines = "".join(json.dumps(rec, ensure_ascii=False) + "\n" for rec in records)
+        f = self._handles[collection_name]
+        f.write(lines)
+        f.flush()
+        if self._fsync:
+            os.fsync(f.fileno())
+        self._log_lines[collection_name] += len(records)
+        if self._pending[collection_name] is not None:
+            self._pending[collection_name].append(lines)
+        self._maybe_compact(collection_name)
+
+    # ---------- 对外接口 ----------
+    def load(self, collection_name):
+        with self._lock:
+            return [dict(item) for item in self._state[collection_name].values()]
+
+    def get(self, collection_name, item_id):
+        with self._lock:
+            item = self._state[collection_name].get(str(item_id))
+            return dict(item) if item is not None else None
+
+    def is_indexed(self, collection_name, field):
+        return field in self._index.get(collection_name, {})
+
+    def find_ids(self, collection_name, field, value):
+        """按索引字段等值查找，返回 id 列表"""
+        with self._lock:
+            postings = self._index[collection_name].get(field)
+            if postings is None:
+                raise ValueError(f"字段 {field} 没有索引，不支持查询")
+            return list(postings.get(value, ()))
+
+    def find(self, collection_name, field, value):
+        with self._lock:
+            state = self._state[collection_name]
+            return [dict(state[key]) for key in self.find_ids(collection_name, field, value)]
+
+    def put(self, collection_name, item, item_id=None):
+        self.put_many(collection_name, [(item, item_id)])
+
+    def put_many(self, collection_name, entries):
+        # entries: [(item, item_id)]，一次追加、一次 flush
+        records = []
+        for item, item_id in entries:
+            if not item_id and "id" in item:
+                item_id = item["id"]
+            key = str(item_id) if item_id else uuid.uuid4().hex
+            records.append({"op": "put", "id": key, "item": item})
+        with self._lock:
+            state = self._state[collection_name]
+            for rec in records:
+                old = state.get(rec["id"])
+                if old is not None:
+                    self._index_remove(collection_name, rec["id"], old)
+                state[rec["id"]] = rec["item"]
+                self._index_add(collection_name, rec["id"], rec["item"])
+            self._append(collection_name, records)
+
+    def delete(self, collection_name, item_id):
+        return self.delete_many(collection_name, [item_id]) > 0
+
+    def delete_many(self, collection_name, item_ids):
+        with self._lock:
+            state = self._state[collection_name]
+            records = []
+            for item_id in item_ids:
+                key = str(item_id)
+                old = state.pop(key, None)
+                if old is not None:
+                    self._index_remove(collection_name, key, old)
+                    records.append({"op": "del", "id": key})
+            if records:
+                self._append(collection_name, records)
+            return len(records)
+
+    def update_field(self, collection_name, item_id, field, value):
+        with self._lock:
+            state = self._state[collection_name]
+            item = state.get(str(item_id))
+            if item is None:
+                return False
+            # 写时复制：后台压缩线程可能正在序列化旧对象
+            self._index_remove(collection_name, str(item_id), item)
+            item = dict(item)
+            item[field] = value
+            state[str(item_id)] = item
+            self._index_add(collection_name, str(item_id), item)
+            self._append(collection_name, [{"op": "set", "id": str(item_id), "field": field, "value": value}])
+            return True
+
+    def close(self):
+        """关闭日志句柄并释放文件锁 (临时打开的实例用完后调用，如迁移目标)"""
+        with self._lock:
+            self._closed = True
+            for handle in self._handles.values():
+                handle.close()
+            for handle in self._file_locks:
+                handle.close()
+
+    # ---------- 后台压缩 ----------
+    def _maybe_compact(self, collection_name):
+        live = len(self._state[collection_name])
+        lines = self._log_lines[collection_name]
+        if self._pending[collection_name] is not None:
+            return
+        if lines < self._compact_min or lines < self._compact_ratio * max(live, 1):
+            return
+        self._pending[collection_name] = []
+        snapshot = list(self._state[collection_name].items())
+        threading.Thread(
+            target=self._compact, args=(collection_name, snapshot), daemon=True
+        ).start()
+
+    def _compact(self, collection_name, snapshot):
+        path = self._paths[collection_name]
+        tmp_path = path + ".compact"
+        try:
+            # 快照写入临时文件时不持锁，写入请求照常进行
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for key, item in snapshot:
+                    f.write(json.dumps({"op": "put", "id": key, "item": item}, ensure_ascii=False) + "\n")
+            with self._lock:
+                if self._closed:
+                    # 已关闭 (锁已释放)：不能再替换日志文件，丢弃这次压缩
+                    os.remove(tmp_path)
+                    return
+                pending = self._pending[collection_name]
+                with open(tmp_path, "a", encoding="utf-8") as f:
+                    f.writelines(pending)
+                    f.flush()
+                    os.fsync(f.fileno())
+                self._handles[collection_name].close()
+                os.replace(tmp_path, path)
+                self._handles[collection_name] = open(path, "a", encoding="utf-8")
+                self._log_lines[collection_name] = len(snapshot) + sum(p.count("\n") for p in pending)
+                self._pending[collection_name] = None
+        except Exception as e:
+            print(f"日志压缩失败 ({collection_name}): {e}")
+            with self._lock:
+                self._pending[collection_name] = None
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
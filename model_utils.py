@@ -3,9 +3,15 @@ import torch.nn as nn
 import torchaudio
 import numpy as np
 import pandas as pd
+import hashlib
 import io
+import itertools
+import math
 import os
 import tempfile
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 import streamlit as st
 
 # ================= 1. 核心配置 =================
@@ -84,49 +90,221 @@ def build_model(arch: str) -> nn.Module:
         raise ValueError(f"未知模型结构: {arch}")
 
 # ================= 3. 音频处理 (Torchaudio 版) =================
-def process_audio_tensor(waveform, sample_rate):
+# 变换对象缓存：MFCC 的 mel 滤波器组 / DCT 矩阵 / 窗函数、Resample 的 sinc 卷积核构建代价远大于单次变换，
+# 按参数缓存后所有片段复用同一个对象 (变换本身无状态，可以跨线程共享)
+_transform_cache = {}
+_transform_lock = threading.Lock()
+# 长片段重采样前先截到 "1 秒 + 余量" 再算：只保留前 1 秒输出，余量覆盖卷积核的感受野
+RESAMPLE_MARGIN_SEC = 0.1
+
+def _cached_transform(key, factory):
+    transform = _transform_cache.get(key)
+    if transform is None:
+        with _transform_lock:
+            transform = _transform_cache.get(key)
+            if transform is None:
+                transform = factory()
+                _transform_cache[key] = transform
+    return transform
+
+def get_mfcc_transform(sample_rate=SR, n_mfcc=N_MFCC, n_fft=N_FFT, hop_length=HOP_LENGTH, n_mels=128):
+    # librosa default n_mels=128, log_mels=False (returns coefficients)
+    return _cached_transform(
+        ("mfcc", sample_rate, n_mfcc, n_fft, hop_length, n_mels),
+        lambda: torchaudio.transforms.MFCC(
+            sample_rate=sample_rate,
+            n_mfcc=n_mfcc,
+            melkwargs={"n_fft": n_fft, "hop_length": hop_length, "n_mels": n_mels}
+        )
+    )
+
+def get_resampler(orig_freq, new_freq=SR):
+    return _cached_transform(
+        ("resample", orig_freq, new_freq),
+        lambda: torchaudio.transforms.Resample(orig_freq=orig_freq, new_freq=new_freq)
+    )
+
+def _resample_group(waveforms, sample_rate, target_len):
     """
-    使用 torchaudio 处理音频张量
+    同一采样率的一组片段一次性重采样
+    各声道展平成 (总声道数, 时间) 的一个批，短片段补零对齐；
+    输出按各片段原本的重采样长度截取 (超出部分与逐条处理时一样视为补零)
+    """
+    keep = math.ceil((target_len / SR + RESAMPLE_MARGIN_SEC) * sample_rate)
+    clipped = [w[:, :keep] for w in waveforms]
+    width = max(w.shape[1] for w in clipped)
+    batch = torch.cat([torch.nn.functional.pad(w, (0, width - w.shape[1])) for w in clipped], dim=0)
+    resampled = get_resampler(sample_rate)(batch)
+
+    outputs, row = [], 0
+    for w in clipped:
+        out_len = math.ceil(SR * w.shape[1] / sample_rate)
+        outputs.append(resampled[row:row + w.shape[0], :out_len])
+        row += w.shape[0]
+    return outputs
+
+def process_audio_batch(clips):
+    """
+    批量处理音频：clips 为 [(waveform, sample_rate), ...]，返回与输入顺序一致的 [(1, 1, T, 40) 张量, ...]
+    按源采样率分组，每组只调用一次重采样；MFCC 对所有片段一次性计算
     """
-    # 1. 重采样
-    if sample_rate != SR:
-        resampler = torchaudio.transforms.Resample(orig_freq=sample_rate, new_freq=SR)
-        waveform = resampler(waveform)
-
-    # 2. 转单声道
-    if waveform.shape[0] > 1:
-        waveform = torch.mean(waveform, dim=0, keepdim=True)
-    
-    # 3. 长度裁剪/填充
     target_len = int(SR * 1.0)
-    current_len = waveform.shape[1]
-    
-    if current_len < target_len:
-        waveform = torch.nn.functional.pad(waveform, (0, target_len - current_len))
-    else:
-        waveform = waveform[:, :target_len]
+    waveforms = [None] * len(clips)
+
+    # 1. 重采样 (按采样率分组)
+    groups = {}
+    for i, (waveform, sample_rate) in enumerate(clips):
+        groups.setdefault(sample_rate, []).append(i)
+    for sample_rate, indices in groups.items():
+        if sample_rate == SR:
+            for i in indices:
+                waveforms[i] = clips[i][0]
+            continue
+        resampled = _resample_group([clips[i][0] for i in indices], sample_rate, target_len)
+        for i, waveform in zip(indices, resampled):
+            waveforms[i] = waveform
+
+    fixed = []
+    for waveform in waveforms:
+        # 2. 转单声道
+        if waveform.shape[0] > 1:
+            waveform = torch.mean(waveform, dim=0, keepdim=True)
+
+        # 3. 长度裁剪/填充
+        current_len = waveform.shape[1]
+        if current_len < target_len:
+            waveform = torch.nn.functional.pad(waveform, (0, target_len - current_len))
+        else:
+            waveform = waveform[:, :target_len]
+        fixed.append(waveform)
+
+    if not fixed:
+        return []
+
+    # 4. 提取 MFCC (整批一次)
+    # 输入必须是 (N, 1, time)：AmplitudeToDB 的 top_db 截断按"倒数第三维"内取最大值，
+    # 若直接传 (N, time)，整批会被当成一个多声道样本，片段之间互相影响
+    mfcc = get_mfcc_transform()(torch.stack(fixed)) # (N, 1, n_mfcc, time)
+    mfcc = mfcc.squeeze(1).transpose(1, 2) # (N, time, n_mfcc)
 
-    # 4. 提取 MFCC
-    # librosa default n_mels=128, log_mels=False (returns coefficients)
-    mfcc_transform = torchaudio.transforms.MFCC(
-        sample_rate=SR,
-        n_mfcc=N_MFCC,
-        melkwargs={"n_fft": N_FFT, "hop_length": HOP_LENGTH, "n_mels": 128}
-    )
-    
-    mfcc = mfcc_transform(waveform) # (Channel, n_mfcc, time)
-    mfcc = mfcc.squeeze(0).transpose(0, 1) # (time, n_mfcc)
-    
     # 5. 调整帧数 (Max Frames)
-    if mfcc.shape[0] < MAX_FRAMES:
-        pad = torch.zeros((MAX_FRAMES - mfcc.shape[0], N_MFCC))
-        mfcc = torch.cat([mfcc, pad], dim=0)
+    if mfcc.shape[1] < MAX_FRAMES:
+        pad = torch.zeros((mfcc.shape[0], MAX_FRAMES - mfcc.shape[1], N_MFCC))
+        mfcc = torch.cat([mfcc, pad], dim=1)
     else:
-        mfcc = mfcc[:MAX_FRAMES, :]
+        mfcc = mfcc[:, :MAX_FRAMES, :]
+
+    # 每条 (1, 1, T, 40)
+    return [m.unsqueeze(0).unsqueeze(0) for m in mfcc]
+
+def process_audio_tensor(waveform, sample_rate):
+    """
+    使用 torchaudio 处理音频张量
+    """
+    return process_audio_batch([(waveform, sample_rate)])[0]
+
+# ================= 4. 特征缓存 (按内容寻址) =================
+# 影响特征结果的全部参数；任何一项变化都会得到不同的缓存键
+FEATURE_CONFIG = (SR, N_MFCC, N_FFT, HOP_LENGTH, 128, MAX_FRAMES, 1.0)
+# 内存中缓存的特征总字节数上限 (单条约 5KB)
+FEATURE_CACHE_MB = 256
+
+class FeatureCache:
+    """
+    MFCC 特征缓存 (进程级，跨模型、跨 Streamlit rerun 共享)
+    - 键：音频字节 + FEATURE_CONFIG 的哈希，同一段音频无论文件名/来自哪次上传都命中
+    - 值：(特征张量, 时长秒数)
+    - 按 LRU 淘汰，内存占用不超过 budget_bytes；设置 spill_dir 时被淘汰的条目写到磁盘，
+      之后未命中内存时先查磁盘 (磁盘目录不做容量管理，可以随时整体删除)
+    - 解码/提特征在线程池里执行，所有操作加锁
+    """
+
+    def __init__(self, budget_bytes, spill_dir=None):
+        self._budget = budget_bytes
+        self._spill_dir = spill_dir
+        self._entries = OrderedDict()   # 键 -> (特征, 时长, 字节数)
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    @staticmethod
+    def key(data, config=FEATURE_CONFIG):
+        digest = hashlib.blake2b(repr(config).encode("utf-8"), digest_size=20)
+        digest.update(data)
+        return digest.hexdigest()
+
+    def _spill_path(self, key):
+        return os.path.join(self._spill_dir, f"{key}.pt")
+
+    def get(self, key):
+        """返回 (特征, 时长秒数)；未命中返回 None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0], entry[1]
+        if self._spill_dir and os.path.exists(self._spill_path(key)):
+            try:
+                saved = torch.load(self._spill_path(key), weights_only=True)
+            except Exception:
+                saved = None
+            if saved is not None:
+                self.put(key, saved["feature"], float(saved["duration"]))
+                with self._lock:
+                    self.hits += 1
+                return saved["feature"], float(saved["duration"])
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, feature, duration):
+        nbytes = feature.numel() * feature.element_size()
+        if nbytes > self._budget:
+            return
+        # 批处理产出的特征是整批张量的视图，复制一份，避免缓存一条就拖住整批的内存
+        feature = feature.clone()
+        evicted = []
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= old[2]
+            self._entries[key] = (feature, duration, nbytes)
+            self._size += nbytes
+            while self._size > self._budget:
+                old_key, (old_feature, old_duration, old_bytes) = self._entries.popitem(last=False)
+                self._size -= old_bytes
+                evicted.append((old_key, old_feature, old_duration))
+        for old_key, old_feature, old_duration in evicted:
+            self._spill(old_key, old_feature, old_duration)
+
+    def _spill(self, key, feature, duration):
+        if not self._spill_dir or os.path.exists(self._spill_path(key)):
+            return
+        tmp_path = self._spill_path(key) + f".{threading.get_ident()}.tmp"
+        try:
+            torch.save({"feature": feature, "duration": duration}, tmp_path)
+            os.replace(tmp_path, self._spill_path(key))
+        except OSError:
+            pass
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._size, "hits": self.hits, "misses": self.misses}
 
-    # (1, 1, T, 40)
-    tensor = mfcc.unsqueeze(0).unsqueeze(0)
-    return tensor
+# 溢出目录通过环境变量开启 (例如挂载卷上的目录)，不设置则只用内存
+feature_cache = FeatureCache(
+    FEATURE_CACHE_MB * 1024 * 1024,
+    spill_dir=os.environ.get("MOSQUITO_FEATURE_CACHE_DIR") or None
+)
 
 def parse_label_from_filename(filename):
     fname = filename.lower()
@@ -137,24 +315,87 @@ def parse_label_from_filename(filename):
     else:
         return -1, "❓ 未知"
 
+# WAV 格式码：PCM 整数 / IEEE 浮点 / 扩展格式 (真实格式在子格式 GUID 的前两个字节)
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+def _decode_wav_bytes(data):
+    """
+    直接从内存解析 PCM / 浮点 WAV，返回 (waveform, sample_rate)；不是这类 WAV 时返回 None
+    数值归一化与 torchaudio.load 一致：整数按位深缩放到 [-1, 1)，8 位为无符号偏移 128
+    """
+    if len(data) < 12 or data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        return None
+    fmt = None
+    pos = 12
+    while pos + 8 <= len(data):
+        chunk_id = data[pos:pos + 4]
+        size = int.from_bytes(data[pos + 4:pos + 8], "little")
+        body = pos + 8
+        if chunk_id == b"fmt " and size >= 16:
+            tag = int.from_bytes(data[body:body + 2], "little")
+            channels = int.from_bytes(data[body + 2:body + 4], "little")
+            sample_rate = int.from_bytes(data[body + 4:body + 8], "little")
+            bits = int.from_bytes(data[body + 14:body + 16], "little")
+            if tag == WAVE_FORMAT_EXTENSIBLE and size >= 26:
+                tag = int.from_bytes(data[body + 24:body + 26], "little")
+            fmt = (tag, channels, sample_rate, bits)
+        elif chunk_id == b"data":
+            if fmt is None:
+                return None
+            tag, channels, sample_rate, bits = fmt
+            width = bits // 8
+            if channels < 1 or sample_rate < 1 or bits % 8 or width < 1:
+                return None
+            # 流式写出的文件 data 长度可能是占位值，按实际剩余字节截到整帧
+            size = min(size, len(data) - body)
+            size -= size % (width * channels)
+            raw = np.frombuffer(data, dtype=np.uint8, count=size, offset=body)
+            if tag == WAVE_FORMAT_PCM and width == 1:
+                samples = (raw.astype(np.float32) - 128.0) / 128.0
+            elif tag == WAVE_FORMAT_PCM and width in (2, 4):
+                samples = raw.view(f"<i{width}").astype(np.float32) / float(2 ** (bits - 1))
+            elif tag == WAVE_FORMAT_PCM and width == 3:
+                # 24 位：补一个低位零字节拼成 int32，再按 24 位缩放
+                padded = np.zeros((size // 3, 4), dtype=np.uint8)
+                padded[:, 1:] = raw.reshape(-1, 3)
+                samples = padded.view("<i4").ravel().astype(np.float32) / float(2 ** 31)
+            elif tag == WAVE_FORMAT_IEEE_FLOAT and width in (4, 8):
+                samples = raw.view(f"<f{width}").astype(np.float32)
+            else:
+                return None
+            # (Time * Channel) 交错排列 -> (Channel, Time)
+            waveform = torch.from_numpy(np.ascontiguousarray(samples.reshape(-1, channels).T))
+            return waveform, sample_rate
+        pos = body + size + (size & 1)   # chunk 按偶数字节对齐
+    return None
+
 def load_audio_from_uploaded(uploaded_file):
     """
-    使用 torchaudio 读取 (支持 wav, mp3 等)
+    读取上传的音频，返回 (waveform, sample_rate)，waveform: (Channel, Time)
+    1. PCM / 浮点 WAV：直接解析内存中的字节，不经过文件系统
+    2. 其他格式：torchaudio 从 BytesIO 解码
+    3. 当前 torchaudio 后端不支持类文件对象时，才退回写临时文件
     """
     data = uploaded_file.getvalue()
-    
-    # torchaudio.load 支持类文件对象吗？部分版本支持，最稳妥是写临时文件
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as f:
+
+    decoded = _decode_wav_bytes(data)
+    if decoded is not None:
+        return decoded
+
+    try:
+        return torchaudio.load(io.BytesIO(data))
+    except Exception:
+        pass
+
+    with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(getattr(uploaded_file, "name", ""))[1] or ".wav") as f:
         f.write(data)
         tmp_path = f.name
 
     try:
         # torchaudio 读取返回 (waveform, sample_rate)
-        # waveform: (Channel, Time)
-        waveform, sr = torchaudio.load(tmp_path)
-        return waveform, sr
-    except Exception as e:
-        raise e
+        return torchaudio.load(tmp_path)
     finally:
         try:
             os.remove(tmp_path)
@@ -184,12 +425,109 @@ def load_model_from_bytes(uploaded_file, arch: str):
         return None, f"❌ 模型加载失败（{arch}）：{e}"
 
 # ================= 6. 推理与统计 =================
-def run_infer(model: nn.Module, audio_files, use_long=False, min_conf=0.5, ratio_thr=0.3, enhance=False):
+# 每批送入模型的片段数 (解码/特征也按这个粒度分块)
+INFER_BATCH_SIZE = 64
+# 解码/提特征的后台线程数 (0 表示在脚本线程里串行处理)
+INFER_WORKERS = os.cpu_count() or 1
+# 每个线程最多领先推理多少块：已完成但尚未推理的块数上限为 线程数 × 该值，限制内存中的特征数量
+INFER_PREFETCH = 2
+
+def _failure_row(file_name, error):
+    true_idx, true_str = parse_label_from_filename(file_name)
+    return {
+        "文件名": file_name,
+        "真实标签": true_str,
+        "真实idx": true_idx,
+        "预测标签": "❌ 读取失败",
+        "预测idx": -1,
+        "置信度": 0.0,
+        "判定": f"Err: {str(error)[:20]}",
+        "时长": "N/A"
+    }
+
+def _featurize_chunk(clips):
+    # 整块一次提特征；某个片段让整块失败时退回逐条处理，只有出错的那条记为失败
+    try:
+        return process_audio_batch(clips)
+    except Exception:
+        features = []
+        for waveform, sr in clips:
+            try:
+                features.append(process_audio_tensor(waveform, sr))
+            except Exception as e:
+                features.append(e)
+        return features
+
+def _prepare_chunk(chunk):
+    """
+    解码 + 提特征 (在工作线程中执行，不调用任何 st.* 接口)
+    chunk: [(序号, 文件)]；返回 (失败行 [(序号, 结果行)], 可推理 [(序号, 文件, 时长字符串, 特征)])
+    """
+    failures = []
+    ready = []
+
+    # 0. 查特征缓存：命中的片段跳过解码和提特征
+    # 1. 解码
+    decoded = []   # [(序号, 文件, 缓存键, waveform, sr)]
+    for i, audio_file in chunk:
+        key = FeatureCache.key(audio_file.getvalue())
+        cached = feature_cache.get(key)
+        if cached is not None:
+            ready.append((i, audio_file, f"{cached[1]:.2f}s", cached[0]))
+            continue
+        try:
+            waveform, sr = load_audio_from_uploaded(audio_file)
+        except Exception as e:
+            failures.append((i, _failure_row(audio_file.name, e)))
+            continue
+        decoded.append((i, audio_file, key, waveform, sr))
+
+    # 2. 提特征
+    # TODO: 实现 enhance 和 use_long 的逻辑
+    # 目前只使用基础逻辑
+    features = _featurize_chunk([(waveform, sr) for _, _, _, waveform, sr in decoded])
+    for (i, audio_file, key, waveform, sr), feature in zip(decoded, features):
+        if isinstance(feature, Exception):
+            failures.append((i, _failure_row(audio_file.name, feature)))
+        else:
+            # 计算时长 (波形在这里就可以释放，只保留特征)
+            duration = waveform.shape[1] / sr
+            feature_cache.put(key, feature, duration)
+            ready.append((i, audio_file, f"{duration:.2f}s", feature))
+    return failures, ready
+
+def _prepared_chunks(chunks, workers):
+    """
+    按顺序产出每块的 _prepare_chunk 结果
+    workers > 0 时由线程池并发预处理后面的块 (torch / numpy 运算会释放 GIL)，
+    同时在途的块数不超过 workers × INFER_PREFETCH：消费方推理完一块才会提交下一块 (背压)
+    """
+    if workers <= 0:
+        for chunk in chunks:
+            yield _prepare_chunk(chunk)
+        return
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="infer-prep")
+    try:
+        pending = deque()
+        chunk_iter = iter(chunks)
+        for chunk in itertools.islice(chunk_iter, workers * INFER_PREFETCH):
+            pending.append(executor.submit(_prepare_chunk, chunk))
+        while pending:
+            prepared = pending.popleft().result()
+            for chunk in itertools.islice(chunk_iter, 1):
+                pending.append(executor.submit(_prepare_chunk, chunk))
+            yield prepared
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+def run_infer(model: nn.Module, audio_files, use_long=False, min_conf=0.5, ratio_thr=0.3, enhance=False,
+              batch_size=INFER_BATCH_SIZE, workers=INFER_WORKERS):
     """
-    运行推理
+    运行推理：按 batch_size 分块，后台线程池 (workers 个线程) 解码并提特征，脚本线程逐块整批前向
     use_long, min_conf, ratio_thr, enhance 目前是占位参数，用于兼容接口，未来可实现具体逻辑
     """
-    results = []
+    batch_size = max(int(batch_size), 1)
+    results = [None] * len(audio_files)
     correct_count = 0
     total_labeled = 0
     
@@ -198,60 +536,51 @@ def run_infer(model: nn.Module, audio_files, use_long=False, min_conf=0.5, ratio
 
     progress = st.progress(0)
 
-    for i, audio_file in enumerate(audio_files):
-        progress.progress((i + 1) / max(len(audio_files), 1))
+    chunks = (
+        list(enumerate(audio_files[start:start + batch_size], start=start))
+        for start in range(0, len(audio_files), batch_size)
+    )
+    done = 0
+    for failures, ready in _prepared_chunks(chunks, int(workers)):
+        for i, row in failures:
+            results[i] = row
 
-        try:
-            waveform, sr = load_audio_from_uploaded(audio_file)
-            # TODO: 实现 enhance 和 use_long 的逻辑
-            # 目前只使用基础逻辑
-            input_tensor = process_audio_tensor(waveform, sr)
-        except Exception as e:
-            true_idx, true_str = parse_label_from_filename(audio_file.name)
-            results.append({
-                "文件名": audio_file.name,
-                "真实标签": true_str,
-                "真实idx": true_idx,
-                "预测标签": "❌ 读取失败",
-                "预测idx": -1,
-                "置信度": 0.0,
-                "判定": f"Err: {str(e)[:20]}",
-                "时长": "N/A"
-            })
-            continue
+        # 3. 整批前向
+        if ready:
+            with torch.no_grad():
+                output = model(torch.cat([feature for _, _, _, feature in ready], dim=0))
+                probs = torch.softmax(output, dim=1)
+                pred_idxs = torch.argmax(probs, dim=1)
 
-        with torch.no_grad():
-            output = model(input_tensor)
-            probs = torch.softmax(output, dim=1)
-            pred_idx = int(torch.argmax(probs).item())
-            confidence = float(probs[0, pred_idx].item())
-            
-        # 计算时长
-        duration = waveform.shape[1] / sr
-        duration_str = f"{duration:.2f}s"
-
-        true_idx, true_str = parse_label_from_filename(audio_file.name)
-        pred_str = CLASSES[pred_idx]
-
-        judge = "N/A"
-        if true_idx != -1:
-            total_labeled += 1
-            if true_idx == pred_idx:
-                correct_count += 1
-                judge = "✅ 正确"
-            else:
-                judge = "❌ 错误"
-
-        results.append({
-            "文件名": audio_file.name,
-            "真实标签": true_str,
-            "真实idx": true_idx,
-            "预测标签": pred_str,
-            "预测idx": pred_idx,
-            "置信度": confidence,
-            "判定": judge,
-            "时长": duration_str
-        })
+            for row, (i, audio_file, duration_str, _) in enumerate(ready):
+                pred_idx = int(pred_idxs[row].item())
+                confidence = float(probs[row, pred_idx].item())
+
+                true_idx, true_str = parse_label_from_filename(audio_file.name)
+                pred_str = CLASSES[pred_idx]
+
+                judge = "N/A"
+                if true_idx != -1:
+                    total_labeled += 1
+                    if true_idx == pred_idx:
+                        correct_count += 1
+                        judge = "✅ 正确"
+                    else:
+                        judge = "❌ 错误"
+
+                results[i] = {
+                    "文件名": audio_file.name,
+                    "真实标签": true_str,
+                    "真实idx": true_idx,
+                    "预测标签": pred_str,
+                    "预测idx": pred_idx,
+                    "置信度": confidence,
+                    "判定": judge,
+                    "时长": duration_str
+                }
+
+        done += len(failures) + len(ready)
+        progress.progress(done / max(len(audio_files), 1))
 
     progress.empty()
 
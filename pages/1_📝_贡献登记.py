@@ -20,9 +20,12 @@ tab_my, tab_market, tab_new = st.tabs(["📌 我的任务", "🌍 任务广场 (
 
 selected_task = None
 
+# 任务索引：按成员/状态查找不再逐个扫描任务列表
+task_index = db_adapter.get_task_index()
+my_tasks = task_index.involved(user_name)
+
 # === Tab 1: 我的任务 (参与的) ===
 with tab_my:
-    my_tasks = db_adapter.get_user_involved_tasks(user_name)
     if not my_tasks:
         st.warning("您当前没有参与任何任务分支。您可以去“任务广场”加入，或“新建任务分支”。")
     else:
@@ -40,11 +43,10 @@ with tab_my:
 # === Tab 2: 任务广场 (所有进行中的) ===
 with tab_market:
     st.markdown("#### 🌍 发现团队正在进行的所有分支")
-    all_tasks = db_adapter.get_all_active_tasks()
     
     # 排除我已经参与的
-    my_task_ids = [t["id"] for t in db_adapter.get_user_involved_tasks(user_name)]
-    available_tasks = [t for t in all_tasks if t["id"] not in my_task_ids]
+    my_task_ids = set(t["id"] for t in my_tasks)
+    available_tasks = [t for t in task_index.tasks if t["id"] not in my_task_ids]
     
     if not available_tasks:
         st.info("暂时没有您可以加入的新任务（所有任务您都已参与，或暂无任务）。")
@@ -11,6 +11,8 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from model_utils import (
     load_model_from_bytes, 
     run_infer, 
+    INFER_BATCH_SIZE,
+    INFER_WORKERS,
     SR, 
     N_MFCC
 )
@@ -41,6 +43,11 @@ with st.sidebar:
         ratio_thr = st.slider("蚊子片段比例阈值", 0.0, 1.0, 0.3)
     else:
         min_conf, ratio_thr = 0.5, 0.3
+    infer_batch = st.number_input("推理批大小", min_value=1, max_value=1024, value=INFER_BATCH_SIZE, step=16,
+                                  help="每次送入模型的音频条数，越大吞吐越高、内存占用越多")
+    # 默认值取 CPU 核数，超过 64 核的机器上截到上限，否则 number_input 会报错
+    infer_workers = st.number_input("解码/特征线程数", min_value=0, max_value=64, value=min(INFER_WORKERS, 64),
+                                    help="后台并行解码和提取 MFCC 的线程数，0 表示不用后台线程")
     st.divider()
     # --------------------------
 
@@ -127,7 +134,7 @@ with root.container():
                         
                         # 调用推理函数 (传入新参数)
                         with st.spinner("正在进行推理分析..."):
-                            df, metrics = run_infer(model, audio_files, use_long, min_conf, ratio_thr, enhance)
+                            df, metrics = run_infer(model, audio_files, use_long, min_conf, ratio_thr, enhance, infer_batch, infer_workers)
 
                         c1, c2, c3, c4, c5 = st.columns(5)
                         c1.metric("测试样本总数", metrics["samples"])
@@ -218,8 +225,8 @@ with root.container():
                         # -----------------------
 
                         with st.spinner("正在对比推理中..."):
-                            df_a, m_a = run_infer(model_a, audio_files, use_long, min_conf, ratio_thr, enhance)
-                            df_b, m_b = run_infer(model_b, audio_files, use_long, min_conf, ratio_thr, enhance)
+                            df_a, m_a = run_infer(model_a, audio_files, use_long, min_conf, ratio_thr, enhance, infer_batch, infer_workers)
+                            df_b, m_b = run_infer(model_b, audio_files, use_long, min_conf, ratio_thr, enhance, infer_batch, infer_workers)
 
                         st.subheader("📊 核心指标对比")
                         cc1, cc2, cc3, cc4, cc5 = st.columns(5)
@@ -60,17 +60,9 @@ with tab_tasks:
         with col2:
             if st.button("🚨 确认删除任务", type="primary", disabled=(task_to_delete is None)):
                 if task_to_delete:
-                    # 1. 删除任务
-                    db_adapter.delete_item("tasks", task_to_delete['id'])
-                    
-                    # 2. 级联删除关联的贡献记录
-                    all_contribs = db_adapter._load_data("contributions")
-                    deleted_count = 0
-                    for c in all_contribs:
-                        if str(c.get('task_id')) == str(task_to_delete['id']):
-                            if 'id' in c:
-                                db_adapter.delete_item("contributions", c['id'])
-                                deleted_count += 1
+                    # 删除任务并级联删除关联的贡献记录
+                    counts = db_adapter.delete_task_cascade(task_to_delete['id'])
+                    deleted_count = counts["contributions"]
                     
                     st.success(f"任务 {task_to_delete['name']} 已删除！(同时清理了 {deleted_count} 条打卡记录)")
                     st.rerun()
@@ -94,14 +86,50 @@ with tab_tasks:
 with tab_contribs:
     st.markdown("### 🧹 贡献数据清洗")
     st.caption("直接修改数值或删除错误记录。")
+
+    # 评分规则 (SCORE_CONFIG) 调整后，按新系数批量重算历史得分
+    with st.expander("🔄 按当前评分规则批量重算得分"):
+        st.caption("根据每条记录保存的 B/D/M 选项重新计算 V = (B × D) × M，只写回有变化的记录。")
+        col_preview, col_apply = st.columns(2)
+        rescore_report = None
+        with col_preview:
+            if st.button("🔍 预览变化", key="rescore_preview"):
+                rescore_report = db_adapter.rescore_contributions(dry_run=True)
+        with col_apply:
+            if st.button("✅ 执行重算", type="primary", key="rescore_apply"):
+                rescore_report = db_adapter.rescore_contributions()
+                st.toast(f"✅ 已重算 {rescore_report['changed']} 条记录")
+        if rescore_report is not None:
+            m1, m2, m3, m4 = st.columns(4)
+            m1.metric("记录总数", rescore_report["total"])
+            m2.metric("得分变化", rescore_report["changed"])
+            m3.metric("无法重算 (缺少分项)", rescore_report["skipped"])
+            m4.metric("总分变化", f"{rescore_report['delta_v']:+.1f}")
+            if not rescore_report["changes"].empty:
+                st.dataframe(rescore_report["changes"], use_container_width=True, hide_index=True)
+
+    # 游标分页：只取当前页，游标栈用于"上一页"
+    PAGE_SIZE = 50
+    if "contrib_cursors" not in st.session_state:
+        st.session_state["contrib_cursors"] = [None]
+    page_cursors = st.session_state["contrib_cursors"]
+    raw_contribs, next_cursor = db_adapter.list_contributions("timestamp", PAGE_SIZE, page_cursors[-1])
     
-    raw_contribs = db_adapter._load_data("contributions")
+    nav1, nav2, nav3 = st.columns([1, 1, 4])
+    with nav1:
+        if st.button("⬅️ 上一页", disabled=len(page_cursors) <= 1, key="contrib_prev"):
+            page_cursors.pop()
+            st.rerun()
+    with nav2:
+        if st.button("下一页 ➡️", disabled=next_cursor is None, key="contrib_next"):
+            page_cursors.append(next_cursor)
+            st.rerun()
+    with nav3:
+        st.caption(f"第 {len(page_cursors)} 页 (每页 {PAGE_SIZE} 条，按时间倒序)")
     
     if not raw_contribs:
         st.info("暂无贡献数据。")
     else:
-        raw_contribs.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
-        
         h1, h2, h3, h4, h5, h6 = st.columns([2, 2, 3, 2, 4, 2])
         h1.markdown("**日期**")
         h2.markdown("**成员**")
@@ -111,7 +139,7 @@ with tab_contribs:
         h6.markdown("**操作**")
         st.divider()
 
-        for i, item in enumerate(raw_contribs[:50]):
+        for i, item in enumerate(raw_contribs):
             if 'id' not in item:
                 continue
                 
@@ -136,8 +164,10 @@ with tab_contribs:
                 col_save, col_del = st.columns(2)
                 with col_save:
                     if st.button("💾", key=f"save_{item['id']}", help="保存修改"):
+                        # 复制后再改，不污染 db_adapter 的读缓存
+                        item = dict(item)
                         if isinstance(item.get('score'), dict):
-                            item['score']['V'] = new_v
+                            item['score'] = {**item['score'], 'V': new_v}
                         else:
                             item['score'] = {'V': new_v}
                         item['description'] = new_desc
@@ -164,13 +194,11 @@ with tab_danger:
     if st.button("💣 清空所有任务和贡献记录", type="primary", disabled=(confirm_text != "DELETE ALL")):
         # 1. 清空任务
         tasks = db_adapter._load_data("tasks")
-        for t in tasks:
-            if 'id' in t: db_adapter.delete_item("tasks", t['id'])
+        db_adapter.delete_many("tasks", [t['id'] for t in tasks if 'id' in t])
             
         # 2. 清空贡献
         contribs = db_adapter._load_data("contributions")
-        for c in contribs:
-            if 'id' in c: db_adapter.delete_item("contributions", c['id'])
+        db_adapter.delete_many("contributions", [c['id'] for c in contribs if 'id' in c])
             
         st.success("💥 系统已重置！所有数据已清空。")
         st.balloons()
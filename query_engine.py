@@ -0,0 +1,234 @@
+import threading
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+# 尝试导入 DuckDB (可选依赖，未安装时退回 pandas 实现，结果一致)
+try:
+    import duckdb
+    DUCKDB_AVAILABLE = True
+except ImportError:
+    DUCKDB_AVAILABLE = False
+
+
+# ================= 趋势图降采样 =================
+# 日期跨度 (天) 不超过阈值时使用对应的分桶粒度，再长则按月
+TREND_BUCKETS = [(92, "day"), (730, "week")]
+
+def choose_trend_bucket(start, end):
+    """按所选日期范围挑选趋势图的分桶粒度：day / week / month"""
+    if start is None or end is None:
+        return "day"
+    span = (date.fromisoformat(str(end)[:10]) - date.fromisoformat(str(start)[:10])).days
+    for max_days, bucket in TREND_BUCKETS:
+        if span <= max_days:
+            return bucket
+    return "month"
+
+def lttb_indices(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets 降采样，返回保留点的下标 (升序)
+    首尾点必定保留，中间每个桶保留与前一个保留点、后一个桶均值构成三角形面积最大的点
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    keep = [0]
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = edges[i + 1], (edges[i + 2] if i + 2 < len(edges) else n)
+        avg_x, avg_y = x[next_lo:next_hi].mean(), y[next_lo:next_hi].mean()
+        a = keep[-1]
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        keep.append(lo + int(area.argmax()))
+    keep.append(n - 1)
+    return np.array(keep)
+
+def downsample_series(df, x, y, by, max_points):
+    """对 df 中按 by 分组的每条序列分别做 LTTB，每条最多保留 max_points 个点"""
+    parts = []
+    for _, group in df.groupby(by, sort=False):
+        group = group.sort_values(x)
+        xs = group[x] if pd.api.types.is_numeric_dtype(group[x]) else pd.to_datetime(group[x]).astype("int64")
+        parts.append(group.iloc[lttb_indices(xs.to_numpy(), group[y].to_numpy(), max_points)])
+    if not parts:
+        return df
+    return pd.concat(parts).reset_index(drop=True)
+
+
+class ContributionQuery:
+    """
+    数据看板的查询引擎
+    - detail: 贡献明细 DataFrame (get_contributions 的结果)；rollup: 汇总表 (user/date/category/V/count)
+    - 筛选、分组、计数都以查询的形式下推，只物化筛选/聚合后的结果
+    - 安装了 DuckDB 时由 DuckDB 直接扫描 DataFrame (列式、多线程、零拷贝)，否则用 pandas 计算
+    - 日期统一按 "YYYY-MM-DD" 字符串比较，不再每次对整列做 pd.to_datetime
+    """
+
+    def __init__(self, detail, rollup):
+        self._detail = detail
+        self._rollup = rollup
+        # 引擎由所有会话线程共享，而 DuckDB 连接本身不是线程安全的：
+        # 这里只保留一个"父连接"，每次查询在自己的游标 (独立连接) 上执行
+        self._con = duckdb.connect() if DUCKDB_AVAILABLE else None
+        self._con_lock = threading.Lock()
+
+    # ---------- 内部工具 ----------
+    @staticmethod
+    def _where(users, start, end, date_col="date", not_null=()):
+        # 生成 WHERE 子句和参数；users 为 None 表示不按成员筛选
+        # not_null: 分组键列，与 pandas 的 groupby 一致丢弃缺失值所在的组
+        where, params = [f"{col} IS NOT NULL" for col in not_null], []
+        if users is not None:
+            if not users:
+                return "WHERE FALSE", []
+            where.append(f"user IN ({', '.join('?' * len(users))})")
+            params += list(users)
+        if start is not None:
+            where.append(f"substr(CAST({date_col} AS VARCHAR), 1, 10) >= ?")
+            params.append(str(start))
+        if end is not None:
+            where.append(f"substr(CAST({date_col} AS VARCHAR), 1, 10) <= ?")
+            params.append(str(end))
+        return ("WHERE " + " AND ".join(where)) if where else "", params
+
+    @staticmethod
+    def _mask(df, users, start, end):
+        mask = pd.Series(True, index=df.index)
+        if users is not None:
+            mask &= df["user"].isin(list(users))
+        if start is not None or end is not None:
+            # 缺失日期不参与比较 (与 SQL 中 NULL 的语义一致)
+            day = df["date"].astype(str).str[:10].where(df["date"].notna())
+            if start is not None:
+                mask &= day >= str(start)
+            if end is not None:
+                mask &= day <= str(end)
+        return mask
+
+    def _execute(self, sql, params=()):
+        # 每次查询新建游标并注册两张表 (注册只是引用 DataFrame，不复制数据；注册的视图只在本游标可见)
+        with self._con_lock:
+            cur = self._con.cursor()
+        cur.register("detail", self._detail)
+        cur.register("rollup", self._rollup)
+        return cur.execute(sql, list(params))
+
+    def _sql(self, sql, params=()):
+        return self._execute(sql, params).df()
+
+    # ---------- 筛选项 ----------
+    @property
+    def columns(self):
+        """明细表的全部列名"""
+        return list(self._detail.columns)
+
+    def users(self):
+        """汇总表中出现过的全部成员 (按首次出现顺序，不含缺失值)"""
+        if self._rollup.empty:
+            return []
+        # 缺失的成员名若混进 IN (?) 参数，DuckDB 会把参数推断成 DOUBLE 并尝试把整列 user 转成数字
+        return list(self._rollup["user"].dropna().unique())
+
+    def date_bounds(self):
+        """返回 (最早日期, 最晚日期) 字符串；无数据时返回 (None, None)"""
+        if self._rollup.empty:
+            return None, None
+        if self._con is not None:
+            row = self._execute("SELECT min(date), max(date) FROM rollup").fetchone()
+            return row[0], row[1]
+        return self._rollup["date"].min(), self._rollup["date"].max()
+
+    # ---------- 聚合 ----------
+    def summary(self, users=None, start=None, end=None):
+        """核心指标：{"total_v", "count", "active_users"}"""
+        if self._con is not None:
+            where, params = self._where(users, start, end)
+            row = self._execute(
+                f"SELECT coalesce(sum(V), 0), coalesce(sum(count), 0), count(DISTINCT user) FROM rollup {where}",
+                params
+            ).fetchone()
+            return {"total_v": float(row[0]), "count": int(row[1]), "active_users": int(row[2])}
+        df = self._rollup[self._mask(self._rollup, users, start, end)]
+        return {"total_v": float(df["V"].sum()), "count": int(df["count"].sum()), "active_users": df["user"].nunique()}
+
+    def category_counts(self, users=None, start=None, end=None):
+        """各场景的贡献条数 (category / count)，按条数降序"""
+        if self._con is not None:
+            where, params = self._where(users, start, end, not_null=("category",))
+            return self._sql(
+                f"SELECT category, CAST(sum(count) AS BIGINT) AS count FROM rollup {where} "
+                f"GROUP BY category ORDER BY count DESC, category",
+                params
+            )
+        df = self._rollup[self._mask(self._rollup, users, start, end)]
+        counts = df.groupby("category")["count"].sum().reset_index()
+        return counts.sort_values(["count", "category"], ascending=[False, True]).reset_index(drop=True)
+
+    def leaderboard(self, users=None, start=None, end=None):
+        """成员积分榜 (user / V / count / last_date)，按总分降序"""
+        if self._con is not None:
+            where, params = self._where(users, start, end, not_null=("user",))
+            return self._sql(
+                f"SELECT user, sum(V) AS V, CAST(sum(count) AS BIGINT) AS count, max(date) AS last_date FROM rollup {where} "
+                f"GROUP BY user ORDER BY V DESC, user",
+                params
+            )
+        df = self._rollup[self._mask(self._rollup, users, start, end)]
+        board = df.groupby("user").agg(V=("V", "sum"), count=("count", "sum"), last_date=("date", "max")).reset_index()
+        return board.sort_values(["V", "user"], ascending=[False, True]).reset_index(drop=True)
+
+    def trend(self, users=None, start=None, end=None, bucket="day"):
+        """
+        按 (时间桶, 成员) 汇总的积分 (date / user / V)，按日期升序
+        bucket: day / week (周一开始) / month；date 列为桶起始日 "YYYY-MM-DD"
+        """
+        if self._con is not None:
+            where, params = self._where(users, start, end, not_null=("date", "user"))
+            key = "date"
+            if bucket != "day":
+                day = "TRY_CAST(substr(CAST(date AS VARCHAR), 1, 10) AS DATE)"
+                key = f"strftime(date_trunc('{bucket}', {day}), '%Y-%m-%d')"
+                where = (where + " AND " if where else "WHERE ") + f"{day} IS NOT NULL"
+            return self._sql(
+                f"SELECT {key} AS date, user, sum(V) AS V FROM rollup {where} "
+                f"GROUP BY 1, user ORDER BY 1, user",
+                params
+            )
+        df = self._rollup[self._mask(self._rollup, users, start, end)]
+        if bucket != "day":
+            day = pd.to_datetime(df["date"].astype(str).str[:10], errors="coerce")
+            if bucket == "week":
+                day = day - pd.to_timedelta(day.dt.weekday, unit="D")
+            else:
+                day = day.dt.to_period("M").dt.start_time
+            df = df.assign(date=day.dt.strftime("%Y-%m-%d"))[day.notna()]
+        return df.groupby(["date", "user"])["V"].sum().reset_index()
+
+    # ---------- 明细 ----------
+    def details(self, columns, users=None, start=None, end=None, limit=None):
+        """
+        按日期倒序返回明细记录的指定列 (不存在的列自动跳过)
+        limit: 最多返回条数，None 表示不限；返回 (DataFrame, 筛选后总条数)
+        """
+        columns = [c for c in columns if c in self._detail.columns]
+        if self._detail.empty or "date" not in self._detail.columns:
+            return pd.DataFrame(columns=columns), 0
+        if self._con is not None:
+            where, params = self._where(users, start, end)
+            total = self._execute(f"SELECT count(*) FROM detail {where}", params).fetchone()[0]
+            select = ", ".join(f'"{c}"' for c in columns)
+            sql = f"SELECT {select} FROM detail {where} ORDER BY date DESC"
+            if limit is not None:
+                sql += f" LIMIT {int(limit)}"
+            return self._sql(sql, params), int(total)
+        df = self._detail[self._mask(self._detail, users, start, end)]
+        df = df[columns].sort_values("date", ascending=False)
+        total = len(df)
+        if limit is not None:
+            df = df.head(limit)
+        return df.reset_index(drop=True), total
@@ -0,0 +1,225 @@
+import json
+import os
+import sqlite3
+import threading
+import uuid
+
+# 每个集合需要建立二级索引的字段 (从文档中抽取为独立列)
+INDEXED_FIELDS = {
+    "tasks": ["category", "subcategory", "status"],
+    "contributions": ["task_id", "user", "date", "timestamp"],
+}
+
+
+class SqliteStore:
+    """
+    嵌入式 SQLite 存储 (WAL 模式)
+    - 文档整体以 JSON 存在 doc 列，常用过滤字段额外抽取成带索引的列
+    - tasks.contributors 拆到 task_contributors 表，按成员查任务走索引
+    - 每个线程一个连接 (Streamlit 每个会话一个线程)，写操作串行
+    """
+
+    def __init__(self, path, legacy_files=None):
+        self._path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        is_new = not os.path.exists(path)
+        self._create_schema()
+        if is_new and legacy_files:
+            for collection_name, legacy_file in legacy_files.items():
+                self.import_json(collection_name, legacy_file)
+
+    # ---------- 连接 / 建表 ----------
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _create_schema(self):
+        conn = self._conn()
+        with conn:
+            for table, fields in INDEXED_FIELDS.items():
+                cols = "".join(f', "{f}" TEXT' for f in fields)
+                conn.execute(
+                    f'CREATE TABLE IF NOT EXISTS {table} '
+                    f'(seq INTEGER PRIMARY KEY AUTOINCREMENT, id TEXT UNIQUE NOT NULL, doc TEXT NOT NULL{cols})'
+                )
+                # 旧库升级：补上后来新增的索引列，并从 doc 中回填
+                existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+                missing = [f for f in fields if f not in existing]
+                for f in missing:
+                    conn.execute(f'ALTER TABLE {table} ADD COLUMN "{f}" TEXT')
+                if missing:
+                    rows = conn.execute(f"SELECT id, doc FROM {table}").fetchall()
+                    sets = ", ".join(f'"{f}" = ?' for f in missing)
+                    conn.executemany(
+                        f"UPDATE {table} SET {sets} WHERE id = ?",
+                        [[json.loads(doc).get(f) for f in missing] + [key] for key, doc in rows]
+                    )
+                for f in fields:
+                    conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_{f} ON {table} ("{f}", id)')
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS task_contributors "
+                "(task_id TEXT NOT NULL, user TEXT NOT NULL, PRIMARY KEY (task_id, user))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_task_contributors_user ON task_contributors (user)")
+
+    # ---------- 迁移 ----------
+    def import_json(self, collection_name, json_file):
+        """把旧版 JSON 文件整体导入 (已存在的 id 会被覆盖)"""
+        if not os.path.exists(json_file):
+            return 0
+        try:
+            with open(json_file, "r", encoding="utf-8") as f:
+                items = json.load(f)
+        except Exception:
+            return 0
+        self.put_many(collection_name, [(item, None) for item in items])
+        return len(items)
+
+    # ---------- 内部工具 ----------
+    @staticmethod
+    def _key(item, item_id):
+        if not item_id and "id" in item:
+            item_id = item["id"]
+        return str(item_id) if item_id else uuid.uuid4().hex
+
+    def _upsert(self, conn, collection_name, key, item):
+        fields = INDEXED_FIELDS[collection_name]
+        cols = "".join(f', "{f}"' for f in fields)
+        marks = ", ?" * len(fields)
+        updates = "".join(f', "{f}" = excluded."{f}"' for f in fields)
+        values = [key, json.dumps(item, ensure_ascii=False)] + [item.get(f) for f in fields]
+        conn.execute(
+            f"INSERT INTO {collection_name} (id, doc{cols}) VALUES (?, ?{marks}) "
+            f"ON CONFLICT(id) DO UPDATE SET doc = excluded.doc{updates}",
+            values
+        )
+        if collection_name == "tasks":
+            conn.execute("DELETE FROM task_contributors WHERE task_id = ?", (key,))
+            conn.executemany(
+                "INSERT OR IGNORE INTO task_contributors (task_id, user) VALUES (?, ?)",
+                [(key, u) for u in item.get("contributors", []) or []]
+            )
+
+    def _delete(self, conn, collection_name, keys):
+        keys = [str(k) for k in keys]
+        deleted = 0
+        # 分块避免超出 SQLite 参数个数上限
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            marks = ", ".join("?" * len(chunk))
+            deleted += conn.execute(f"DELETE FROM {collection_name} WHERE id IN ({marks})", chunk).rowcount
+            if collection_name == "tasks":
+                conn.execute(f"DELETE FROM task_contributors WHERE task_id IN ({marks})", chunk)
+        return deleted
+
+    # ---------- 对外接口 ----------
+    def load(self, collection_name):
+        rows = self._conn().execute(f"SELECT doc FROM {collection_name} ORDER BY seq")
+        return [json.loads(doc) for (doc,) in rows]
+
+    def get(self, collection_name, item_id):
+        row = self._conn().execute(f"SELECT doc FROM {collection_name} WHERE id = ?", (str(item_id),)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def find(self, collection_name, filters):
+        """
+        按索引列等值查询
+        filters: {字段: 值}，字段必须在 INDEXED_FIELDS 中；
+        tasks 额外支持 "contributors": 成员名 (成员包含查询)
+        """
+        sql = f"SELECT doc FROM {collection_name} AS t"
+        where, params = [], []
+        for field, value in filters.items():
+            if collection_name == "tasks" and field == "contributors":
+                sql += " JOIN task_contributors AS tc ON tc.task_id = t.id"
+                where.append("tc.user = ?")
+            elif field in INDEXED_FIELDS[collection_name]:
+                where.append(f't."{field}" = ?')
+            else:
+                raise ValueError(f"字段 {field} 没有索引，不支持查询")
+            params.append(value)
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY t.seq"
+        return [json.loads(doc) for (doc,) in self._conn().execute(sql, params)]
+
+    def page(self, collection_name, order_by, limit, after=None, descending=True):
+        """
+        按索引列做 keyset 分页：WHERE (列, id) < (上一页最后一条) ORDER BY 列, id LIMIT n
+        after: 上一页最后一条的 (列值, id)
+        缺少该字段的记录 (列为 NULL) 按 SQLite 的规则排在最前 (降序时在最后)，与内存索引的顺序一致
+        """
+        if order_by not in INDEXED_FIELDS[collection_name]:
+            raise ValueError(f"字段 {order_by} 没有索引，不支持分页排序")
+        direction, cmp = ("DESC", "<") if descending else ("ASC", ">")
+        sql = f"SELECT doc FROM {collection_name}"
+        params = []
+        if after is not None:
+            # 行值比较遇到 NULL 结果为 NULL，NULL 行需要单独处理，否则会被跳过
+            value, last_id = after
+            col = f'"{order_by}"'
+            if value is None:
+                # 上一页停在 NULL 行：降序时只剩 id 更小的 NULL 行；升序时是 id 更大的 NULL 行和全部非 NULL 行
+                cond = f"{col} IS NULL AND id < ?" if descending else f"{col} IS NOT NULL OR id > ?"
+                params.append(last_id)
+            else:
+                cond = f"({col}, id) {cmp} (?, ?)" + (f" OR {col} IS NULL" if descending else "")
+                params += [value, last_id]
+            sql += f" WHERE {cond}"
+        sql += f' ORDER BY "{order_by}" {direction}, id {direction} LIMIT ?'
+        params.append(limit)
+        return [json.loads(doc) for (doc,) in self._conn().execute(sql, params)]
+
+    def iter_docs(self, collection_name, chunk_size=1000):
+        """按写入顺序分块遍历全部文档 (按 seq 做 keyset 分页，内存中最多一块)"""
+        last = 0
+        while True:
+            rows = self._conn().execute(
+                f"SELECT seq, doc FROM {collection_name} WHERE seq > ? ORDER BY seq LIMIT ?", (last, chunk_size)
+            ).fetchall()
+            if not rows:
+                return
+            last = rows[-1][0]
+            yield [json.loads(doc) for _, doc in rows]
+
+    def put(self, collection_name, item, item_id=None):
+        self.put_many(collection_name, [(item, item_id)])
+
+    def put_many(self, collection_name, entries):
+        conn = self._conn()
+        with self._write_lock, conn:
+            for item, item_id in entries:
+                self._upsert(conn, collection_name, self._key(item, item_id), item)
+
+    def delete(self, collection_name, item_id):
+        return self.delete_many(collection_name, [item_id]) > 0
+
+    def delete_many(self, collection_name, item_ids):
+        conn = self._conn()
+        with self._write_lock, conn:
+            return self._delete(conn, collection_name, item_ids)
+
+    def delete_task_cascade(self, task_id):
+        """在同一个事务中删除任务及其全部贡献记录，返回 (任务删除数, 贡献删除数)"""
+        conn = self._conn()
+        with self._write_lock, conn:
+            contributions = conn.execute("DELETE FROM contributions WHERE task_id = ?", (str(task_id),)).rowcount
+            tasks = self._delete(conn, "tasks", [task_id])
+        return tasks, contributions
+
+    def update_field(self, collection_name, item_id, field, value):
+        conn = self._conn()
+        with self._write_lock, conn:
+            row = conn.execute(f"SELECT doc FROM {collection_name} WHERE id = ?", (str(item_id),)).fetchone()
+            if not row:
+                return False
+            item = json.loads(row[0])
+            item[field] = value
+            self._upsert(conn, collection_name, str(item_id), item)
+            return True